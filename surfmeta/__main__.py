@@ -7,9 +7,6 @@ import sys
 from getpass import getpass
 from pathlib import Path
 
-from ckanapi import NotAuthorized, NotFound, ValidationError
-
-from surfmeta.ckan import Ckan
 from surfmeta.ckan_conf import CKANConf, show_available
 from surfmeta.cli_handlers import (
     create_dataset,
@@ -36,6 +33,17 @@ CKANCONFIG = CKANConf()
 # -----------------------------
 # CLI Argument Parser
 # -----------------------------
+def positive_int(value: str) -> int:
+    """Argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'") from exc
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive number, got {number}")
+    return number
+
+
 def build_parser():
     """Create the main parser and subparsers for the CLI."""
     parser = argparse.ArgumentParser(
@@ -76,6 +84,8 @@ def _add_ckan_subcommands(subparsers):
         dest="ckan_command", metavar="<ckan-command>", title="CKAN commands", required=True
     )
 
+    listing_args = {"--full": {"action": "store_true"}, "--refresh": {"action": "store_true"}}
+
     # Core CKAN commands
     cmds = [
         ("list", {}, ckan_list),
@@ -83,8 +93,8 @@ def _add_ckan_subcommands(subparsers):
         ("init", {"url_or_alias": {}}, ckan_init),
         ("remove", {"url_or_alias": {}}, ckan_remove),
         ("alias", {"alias": {}, "url": {}}, ckan_alias),
-        ("orgs", {"--full": {"action": "store_true"}}, ckan_list_orgs),
-        ("groups", {"--full": {"action": "store_true"}}, ckan_list_groups),
+        ("orgs", listing_args, ckan_list_orgs),
+        ("groups", listing_args, ckan_list_groups),
     ]
 
     for cmd, args, func in cmds:
@@ -193,6 +203,16 @@ def _add_dataset_subcommands(subparsers):
             " ⚠️ No checksum check and no path-exists check will be done."
         ),
     )
+    p.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Fetch organisations and groups from CKAN instead of using the cached listing",
+    )
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always recalculate the checksum instead of reusing the cached one for an unchanged file",
+    )
     p.set_defaults(func=cmd_create)
 
     # create-meta-file
@@ -206,6 +226,7 @@ def _add_dataset_subcommands(subparsers):
     g = p.add_mutually_exclusive_group()
     g.add_argument("--sys", action="store_true", help="Show only system metadata")
     g.add_argument("--user", action="store_true", help="Show only user metadata")
+    p.add_argument("--limit", type=positive_int, default=None, help="Show at most this many datasets")
     p.set_defaults(func=cmd_md_list)
 
     # md-search
@@ -222,6 +243,7 @@ def _add_dataset_subcommands(subparsers):
     p.add_argument("--org", "-o", help="Filter by organization")
     p.add_argument("--group", "-g", help="Filter by group")
     p.add_argument("--system", "-s", help="Filter by system")
+    p.add_argument("--limit", type=positive_int, default=None, help="Stop after this many matching datasets")
     p.set_defaults(func=cmd_md_search)
 
     # md-update
@@ -275,6 +297,11 @@ def ckan_alias(args):
 
 def ckan_init(args):
     """Init a ckan connection."""
+    # pylint: disable=import-outside-toplevel
+    from ckanapi import NotAuthorized
+
+    from surfmeta.ckan import Ckan
+
     CKANCONFIG.set_ckan(args.url_or_alias)
     url, entry = CKANCONFIG.get_entry()
     token = _prompt_ckan_token(args.url_or_alias)
@@ -302,17 +329,17 @@ def ckan_remove(args):
 
 def ckan_list_orgs(args):
     """List orgs."""
-    _list_entities(get_ckan_connection().list_organisations, args.full, "organizations")
+    _list_entities(get_ckan_connection().list_organisations, args.full, "organizations", args.refresh)
 
 
 def ckan_list_groups(args):
     """List groups."""
-    _list_entities(get_ckan_connection().list_groups, args.full, "groups")
+    _list_entities(get_ckan_connection().list_groups, args.full, "groups", args.refresh)
 
 
-def _list_entities(list_func, include_full, entity_name):
+def _list_entities(list_func, include_full, entity_name, refresh=False):
     try:
-        entities = list_func(include_extras=include_full)
+        entities = list_func(include_extras=include_full, refresh=refresh)
         if not entities:
             print(f"⚠️ No {entity_name} found.")
             return
@@ -331,6 +358,8 @@ def _list_entities(list_func, include_full, entity_name):
 # -----------------------------
 def cmd_create(args):
     """Create a CKAN dataset/entry."""
+    from ckanapi import ValidationError  # pylint: disable=import-outside-toplevel
+
     ckan_conn = get_ckan_connection()
     if args.remote:
         print("⚠️ WARNING: --remote chosen: skipping checksum and system metadata.")
@@ -341,7 +370,7 @@ def cmd_create(args):
     else:
         sys_meta = get_sys_meta()
         if args.path.is_file():
-            meta_checksum(sys_meta, args.path.resolve())
+            meta_checksum(sys_meta, args.path.resolve(), use_cache=not args.no_cache)
 
     extras = []
     if args.metafile:
@@ -351,7 +380,7 @@ def cmd_create(args):
             print(f"❌ Error reading metafile: {e}")
             return
 
-    meta = user_input_meta(ckan_conn)
+    meta = user_input_meta(ckan_conn, refresh=args.refresh)
     ckan_metadata = merge_ckan_metadata(meta, sys_meta, extras)
     try:
         create_dataset(ckan_conn, ckan_metadata)
@@ -391,6 +420,8 @@ def cmd_md_update(args):
 
 def cmd_md_delete(args):
     """Delete entry or metadata item."""
+    from ckanapi import NotAuthorized, NotFound  # pylint: disable=import-outside-toplevel
+
     ckan_conn = get_ckan_connection()
 
     try:
@@ -413,6 +444,8 @@ def cmd_md_delete(args):
 
 def cmd_get(args):
     """Build the commands to get the data."""
+    from ckanapi import NotAuthorized, NotFound  # pylint: disable=import-outside-toplevel
+
     ckan_conn = get_ckan_connection()
     try:
         dataset = ckan_conn.get_dataset_info(args.uuid)
@@ -1,11 +1,47 @@
 """CKAN functionality for creating and managing datasets."""
 
+import hashlib
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
 from ckanapi import NotAuthorized, NotFound, RemoteCKAN, ValidationError
 from httpx import HTTPError
 
+from surfmeta.utils import read_json_cache, write_json_cache
+
+LISTING_CACHE_FP = Path.home() / ".cache" / "surfmeta" / "listings.json"
+LISTING_CACHE_TTL = 300  # seconds
+
+
+def match_dcache_path(datasets: list[dict], dcache_path: str) -> list[dict]:
+    """Select the datasets whose extras['location'] ends with a dCache path.
+
+    See Ckan.find_dataset_by_dcache_path for the format of the returned entries.
+    """
+    needle = dcache_path.strip()
+    matches = []
+
+    for ds in datasets:
+        extras = ds.get("extras", [])
+
+        for ex in extras:
+            key = ex.get("key")
+            value = ex.get("value")
+
+            if key == "location" and isinstance(value, str):
+                # Check if PNFS path occurs inside the WebDAV URL
+                if value.endswith(needle):
+                    matches.append(
+                        {
+                            "dataset": ds,
+                            "location": ex,
+                        }
+                    )
+                    break  # avoid duplicate matches from the same dataset
+
+    return matches
+
 
 class Ckan:
     """A utility class to interact with a CKAN instance using its API.
@@ -37,6 +73,7 @@ class Ckan:
         self.ckan_url = url.rstrip("/")
         self.ckan_token = token
         self.api = RemoteCKAN(self.ckan_url, apikey=self.ckan_token)
+        self._listings: dict[str, list] = {}
 
         # Quick authentication check
         if not self.user_authenticated():
@@ -139,6 +176,56 @@ class Ckan:
         except Exception as e:  # pylint: disable=broad-exception-caught
             raise HTTPError(f"Error creating dataset: {e}") from e
 
+    def iter_datasets(
+        self, include_private: bool = False, rows: int = 1000, fq: str = "", fl: Optional[str] = None
+    ) -> Iterator[dict]:
+        """Iterate over all datasets available in the CKAN instance.
+
+        Datasets are requested page by page while they are consumed, so a caller
+        that stops early does not download the remaining pages.
+
+        Parameters
+        ----------
+        include_private : bool, optional
+            Whether to include private datasets. Defaults to False.
+        rows : int, optional
+            Number of datasets requested per page. Defaults to 1000.
+        fq : str, optional
+            Solr filter query applied by CKAN, e.g. 'organization:"my-org"'.
+        fl : str, optional
+            Comma separated dataset fields to return instead of the full dataset.
+
+        Yields
+        ------
+        dict
+            Dataset metadata dictionaries.
+
+        Raises
+        ------
+        HTTPError
+            If the API call fails.
+
+        """
+        query = {"rows": rows, "include_private": include_private}
+        if fq:
+            query["fq"] = fq
+        if fl:
+            query["fl"] = fl
+
+        start = 0
+        while True:
+            try:
+                response = self.api.action.package_search(start=start, **query)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                raise HTTPError(f"Error listing datasets: {e}") from e
+
+            results = response.get("results", [])
+            yield from results
+
+            start += len(results)
+            if not results or start >= response.get("count", 0):
+                return
+
     def list_all_datasets(self, include_private: bool = False) -> list:
         """List all datasets available in the CKAN instance.
 
@@ -150,7 +237,7 @@ class Ckan:
         Returns
         -------
         list
-            A list of max 1000 dataset metadata dictionaries.
+            A list of dataset metadata dictionaries.
 
         Raises
         ------
@@ -158,28 +245,7 @@ class Ckan:
             If the API call fails.
 
         """
-        try:
-            response = self.api.action.package_search(rows=1000, include_private=include_private)
-            datasets = response.get("results", [])
-            search_params = {}
-            # If limit is higher than 1000, paginate
-            limit = 1000
-            if limit and limit > 1000:
-                start = len(datasets)
-                while start < limit:
-                    search_params["start"] = start
-                    search_params["rows"] = min(limit - start, 1000)
-                    resp = self.api.action.package_search(**search_params)
-                    results = resp.get("results", [])
-                    if not results:
-                        break
-                    datasets.extend(results)
-                    start += len(results)
-
-            return datasets
-
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            raise HTTPError(f"Error listing datasets: {e}") from e
+        return list(self.iter_datasets(include_private=include_private))
 
     def add_meta_to_dataset(self, dataset_id: str, metadata: dict, verbose: bool = False) -> dict:
         """Add or update metadata fields for an existing dataset.
@@ -312,7 +378,43 @@ class Ckan:
         info = self.get_dataset_info(dataset_id)
         return info.get("resources", [])
 
-    def list_organisations(self, include_extras: bool = False) -> list:
+    def _cached_listing(self, kind: str, fetch: Callable[[], list], refresh: bool = False) -> list:
+        """Return a list of names, reusing a previous response if possible.
+
+        Listings are kept in memory for the lifetime of this instance and on disk
+        for LISTING_CACHE_TTL seconds, so consecutive CLI calls do not repeat the
+        (on large instances slow) listing request. The disk cache is kept per CKAN
+        URL and API token, since other users may see other organisations and groups.
+
+        Parameters
+        ----------
+        kind : str
+            Cache key, e.g. "organizations" or "groups".
+        fetch : callable
+            Function retrieving the names from CKAN on a cache miss.
+        refresh : bool, optional
+            If True, ignore cached values and fetch the listing again.
+
+        """
+        if not refresh and kind in self._listings:
+            return self._listings[kind]
+
+        # Listings depend on the user, so the cache is per instance and token (stored as a hash)
+        token_hash = hashlib.sha256(self.ckan_token.encode()).hexdigest()[:16]
+        cache_key = f"{self.ckan_url} {token_hash}"
+        cache = read_json_cache(LISTING_CACHE_FP)
+        entry = cache.get(cache_key, {}).get(kind)
+        if not refresh and entry and time.time() - entry["time"] < LISTING_CACHE_TTL:
+            names = entry["names"]
+        else:
+            names = fetch()
+            cache.setdefault(cache_key, {})[kind] = {"time": time.time(), "names": names}
+            write_json_cache(LISTING_CACHE_FP, cache)
+
+        self._listings[kind] = names
+        return names
+
+    def list_organisations(self, include_extras: bool = False, refresh: bool = False) -> list:
         """List all organizations visible to the authenticated user.
 
         Parameters
@@ -320,6 +422,8 @@ class Ckan:
         include_extras : bool, optional
             If True, returns full metadata for each organization using organization_show.
             If False, returns only the list of organization names.
+        refresh : bool, optional
+            If True, bypass the cached organization names.
 
         Returns
         -------
@@ -333,7 +437,7 @@ class Ckan:
 
         """
         try:
-            orgs = self.api.action.organization_list()
+            orgs = self._cached_listing("organizations", self.api.action.organization_list, refresh)
             if include_extras:
                 orgs_full = []
                 for org_name in orgs:
@@ -347,7 +451,36 @@ class Ckan:
         except Exception as e:  # pylint: disable=broad-exception-caught
             raise HTTPError(f"Error listing organizations: {e}") from e
 
-    def list_groups(self, include_extras: bool = False) -> list:
+    def search_organisations(self, query: str, limit: int = 20) -> list:
+        """Search organization names matching a query.
+
+        Only names are requested and the number of results is limited, which keeps
+        the call fast on instances with many organizations.
+
+        Parameters
+        ----------
+        query : str
+            Text to search for in the organization names.
+        limit : int, optional
+            Maximum number of names to return. Defaults to 20.
+
+        Returns
+        -------
+        list
+            A list of matching organization names.
+
+        Raises
+        ------
+        HTTPError
+            If the API call fails.
+
+        """
+        try:
+            return self.api.action.organization_list(q=query, limit=limit)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            raise HTTPError(f"Error searching organizations: {e}") from e
+
+    def list_groups(self, include_extras: bool = False, refresh: bool = False) -> list:
         """List all groups available in the CKAN instance.
 
         Parameters
@@ -355,6 +488,8 @@ class Ckan:
         include_extras : bool, optional
             If True, returns full metadata for each group using group_show.
             If False, returns only the list of group names.
+        refresh : bool, optional
+            If True, bypass the cached group names.
 
         Returns
         -------
@@ -368,7 +503,7 @@ class Ckan:
 
         """
         try:
-            groups = self.api.action.group_list()
+            groups = self._cached_listing("groups", self.api.action.group_list, refresh)
             if include_extras:
                 groups_full = []
                 for group_name in groups:
@@ -382,6 +517,67 @@ class Ckan:
         except Exception as e:
             raise HTTPError(f"Error listing groups: {e}") from e
 
+    def search_groups(self, query: str, limit: int = 20) -> list:
+        """Search group names matching a query.
+
+        Parameters
+        ----------
+        query : str
+            Text to search for in the group names.
+        limit : int, optional
+            Maximum number of names to return. Defaults to 20.
+
+        Returns
+        -------
+        list
+            A list of matching group names.
+
+        Raises
+        ------
+        HTTPError
+            If the API call fails.
+
+        """
+        try:
+            return self.api.action.group_list(q=query, limit=limit)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            raise HTTPError(f"Error searching groups: {e}") from e
+
+    def patch_extras(self, dataset_id: str, extras: list[dict]) -> dict:
+        """Replace the extras of a dataset without resending the rest of it.
+
+        CKAN replaces the extras list as a whole, so ``extras`` must contain all
+        extras the dataset should keep, not only the changed ones.
+
+        Parameters
+        ----------
+        dataset_id : str
+            The dataset name or ID.
+        extras : list of dict
+            The complete new extras list in CKAN style [{'key': ..., 'value': ...}].
+
+        Returns
+        -------
+        dict
+            The updated dataset as returned by CKAN.
+
+        Raises
+        ------
+        ValidationError
+            If CKAN rejects the extras.
+        NotFound
+            If the dataset does not exist.
+        HTTPError
+            For other API errors.
+
+        """
+        try:
+            return self.api.action.package_patch(id=dataset_id, extras=extras)
+        except (ValidationError, NotFound):
+            raise
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            raise HTTPError(f"Error updating extras of dataset '{dataset_id}': {e}") from e
+
     def update_dataset(self, dataset_dict: dict):
         """Update an existing CKAN dataset.
 
@@ -409,9 +605,7 @@ class Ckan:
         try:
             updated = self.api.action.package_update(**dataset_dict)
             return updated
-        except ValidationError:
-            raise
-        except NotFound:
+        except (ValidationError, NotFound):
             raise
         except Exception as e:
             raise RuntimeError(f"Unexpected error while updating dataset: {e}") from e
@@ -515,26 +709,4 @@ class Ckan:
             Returns an empty list if no datasets match.
 
         """
-        needle = dcache_path.strip()
-        datasets = self.list_all_datasets(include_private=True)
-        matches = []
-
-        for ds in datasets:
-            extras = ds.get("extras", [])
-
-            for ex in extras:
-                key = ex.get("key")
-                value = ex.get("value")
-
-                if key == "location" and isinstance(value, str):
-                    # Check if PNFS path occurs inside the WebDAV URL
-                    if value.endswith(needle):
-                        matches.append(
-                            {
-                                "dataset": ds,
-                                "location": ex,
-                            }
-                        )
-                        break  # avoid duplicate matches from the same dataset
-
-        return matches
+        return match_dcache_path(self.list_all_datasets(include_private=True), dcache_path)
@@ -1,60 +1,53 @@
 """Useful functions for cli."""
 
-import uuid
+from itertools import islice
+from typing import TYPE_CHECKING
 
-from ckanapi import NotAuthorized, NotFound, ValidationError
+from surfmeta.search_utils import build_filter_query, print_dataset_results, search_datasets
 
-from surfmeta.ckan import Ckan
-from surfmeta.metadata_utils import load_and_validate_flat_json
-from surfmeta.search_utils import print_dataset_results, search_datasets
+if TYPE_CHECKING:
+    from surfmeta.ckan import Ckan
 
+# Extras keys shown as system metadata
+_SYS_KEYS = frozenset({"system_name", "server", "protocols", "uuid"})
+# Number of search matches shown when picking an organisation or group
+_SEARCH_LIMIT = 20
 
-def user_input_meta(ckan_conn: Ckan) -> dict:
+
+def user_input_meta(ckan_conn: "Ckan", refresh: bool = False) -> dict:
     """Retrieve metadata input through CLI with organisation and optional group selection."""
+    import uuid  # pylint: disable=import-outside-toplevel
+
     # Required metadata fields
     dataset_name = input("Dataset name: ").strip()
     author = input("Author name: ").strip()
 
     # --- Organisation selection ---
-    orgs = ckan_conn.list_organisations()
+    orgs = _find_candidates(
+        ckan_conn.search_organisations, ckan_conn.list_organisations, "organisations", refresh
+    )
     if not orgs:
         raise RuntimeError(
             "❌ No organisations found for your account. Cannot create dataset without an organisation."
         )
 
     print("\n📂 Available Organisations:")
-    for idx, org in enumerate(orgs, 1):
-        print(f"  {idx}) {org}")
+    print(_format_listing(orgs))
 
-    while True:
-        try:
-            choice = int(input("Select an organisation by number: "))
-            if 1 <= choice <= len(orgs):
-                chosen_org = orgs[choice - 1]
-                break
-            print(f"❌ Invalid choice. Please choose 1–{len(orgs)}.")
-        except ValueError:
-            print("❌ Please enter a valid number.")
+    chosen_org = _choose(orgs, "Select an organisation by number (or type text to filter): ")
 
     # --- Optional group selection ---
-    groups = ckan_conn.list_groups()
     chosen_groups = []
 
-    if groups:
-        use_group = input("Do you want to add the dataset to a group? [y/N]: ").strip().lower()
-        if use_group == "y":
+    use_group = input("Do you want to add the dataset to a group? [y/N]: ").strip().lower()
+    if use_group == "y":
+        groups = _find_candidates(ckan_conn.search_groups, ckan_conn.list_groups, "groups", refresh)
+        if not groups:
+            print("⚠️ No groups found, the dataset will not be added to a group.")
+        else:
             print("\n📁 Available Groups:")
-            for idx, grp in enumerate(groups, 1):
-                print(f"  {idx}) {grp}")
-            while True:
-                try:
-                    choice = int(input("Select a group by number: "))
-                    if 1 <= choice <= len(groups):
-                        chosen_groups.append(groups[choice - 1])
-                        break
-                    print(f"❌ Invalid choice. Please choose 1–{len(groups)}.")
-                except ValueError:
-                    print("❌ Please enter a valid number.")
+            print(_format_listing(groups))
+            chosen_groups.append(_choose(groups, "Select a group by number (or type text to filter): "))
 
     # --- UUID generation ---
     dataset_uuid = str(uuid.uuid4())
@@ -75,11 +68,57 @@ def user_input_meta(ckan_conn: Ckan) -> dict:
     return metadata
 
 
-def create_dataset(ckan_conn: Ckan, meta: dict):
+def _find_candidates(search_func, list_func, entity_name: str, refresh: bool = False) -> list:
+    """Ask for an optional search term and return the matching names.
+
+    With a search term only a small page of matches is requested from CKAN;
+    without one the full (cached) listing is returned. One match more than is
+    shown is requested, to tell the user when the search should be refined.
+    """
+    while True:
+        query = input(f"Search {entity_name} (leave empty to list all): ").strip()
+        if not query:
+            return list_func(refresh=refresh)
+        names = search_func(query, limit=_SEARCH_LIMIT + 1)
+        if len(names) > _SEARCH_LIMIT:
+            print(f"⚠️ Showing the first {_SEARCH_LIMIT} {entity_name} only, refine the search to see more.")
+            return names[:_SEARCH_LIMIT]
+        if names:
+            return names
+        print(f"❌ No {entity_name} match '{query}'.")
+
+
+def _choose(items: list, prompt: str) -> str:
+    """Ask until a valid number is entered and return that item; text filters the listing."""
+    while True:
+        answer = input(prompt).strip()
+        if not answer:
+            print("❌ Please enter a valid number.")
+            continue
+        if not answer.isdecimal():
+            print(_format_listing(items, answer) or f"❌ Nothing matches '{answer}'.")
+            continue
+        choice = int(answer)
+        if 1 <= choice <= len(items):
+            return items[choice - 1]
+        print(f"❌ Invalid choice. Please choose 1–{len(items)}.")
+
+
+def _format_listing(items: list, text: str = "") -> str:
+    """Format a numbered listing of items, optionally only those containing text.
+
+    The numbers always refer to the position in the full list, so a filtered
+    listing can be used to pick an item by number.
+    """
+    text = text.lower()
+    return "\n".join(f"  {idx}) {item}" for idx, item in enumerate(items, 1) if text in item.lower())
+
+
+def create_dataset(ckan_conn: "Ckan", meta: dict):
     """Create the dataset."""
     response = ckan_conn.create_dataset(meta)
-    uuid_value = next((item["value"] for item in meta["extras"] if item["key"] == "uuid"), None)
-    print(f"🆔 UUID: {uuid_value}")
+    # user_input_meta uses the generated uuid as dataset name
+    print(f"🆔 UUID: {meta['name']}")
     print(f"🌐 Name: {response['title']}")
 
 
@@ -89,41 +128,44 @@ def create_dataset(ckan_conn: Ckan, meta: dict):
 def handle_md_list(ckan_conn, args):
     """Core logic for listing metadata entries from CKAN."""
     if not args.uuid:
-        _list_all_datasets(ckan_conn)
+        _list_all_datasets(ckan_conn, args)
     else:
         _show_dataset_metadata(ckan_conn, args)
 
 
-def _list_all_datasets(ckan_conn):
+def _list_all_datasets(ckan_conn, args):
     """List all datasets in a table-like format (without org/groups)."""
-    datasets = ckan_conn.list_all_datasets(include_private=True)
+    # Only the title and name are printed, so only those are requested
+    limit = getattr(args, "limit", None)
+    datasets = ckan_conn.iter_datasets(include_private=True, fl="name,title")
+    datasets = list(islice(datasets, limit))
     if not datasets:
         print("⚠️ No datasets found on this CKAN instance.")
         return
 
-    print(f"Found {len(datasets)} datasets (including private):\n")
+    # With a limit the count is not the number of datasets on the server
+    print(f"{'Showing' if limit else 'Found'} {len(datasets)} datasets (including private):\n")
 
-    # Determine max lengths for formatting
-    max_title_len = max(len(ds.get("title", "<no title>")) for ds in datasets)
+    # Read the printed fields once and size the title column from them
+    rows = [(ds.get("title", "<no title>"), ds.get("name", "<no uuid>")) for ds in datasets]
+    max_title_len = max(len(title) for title, _ in rows)
 
-    # Print each dataset nicely
-    for ds in datasets:
-        title = ds.get("title", "<no title>")
-        name = ds.get("name", "<no uuid>")
-        print(f"- {title:<{max_title_len}} ({name})")
+    # Print all datasets nicely in a single write
+    print("\n".join(f"- {title:<{max_title_len}} ({name})" for title, name in rows))
 
 
 def _show_dataset_metadata(ckan_conn, args):
     """Show metadata for a specific dataset."""
-    sys_keys = {"system_name", "server", "protocols", "uuid"}
     dataset = ckan_conn.get_dataset_info(args.uuid)
 
-    extras = dataset.get("extras", [])
-    meta_dict = {e["key"]: e["value"] for e in extras if "key" in e and "value" in e}
-
-    # Separate system vs user metadata
-    system_meta = {k: v for k, v in meta_dict.items() if k in sys_keys}
-    user_meta = {k: v for k, v in meta_dict.items() if k not in sys_keys}
+    # Separate system vs user metadata in a single pass over the extras
+    system_meta, user_meta = {}, {}
+    for e in dataset.get("extras", []):
+        key, value = e.get("key"), e.get("value")
+        if key is None or value is None:
+            continue
+        (system_meta if key in _SYS_KEYS else user_meta)[key] = value
+    meta_dict = {**system_meta, **user_meta}
 
     # Apply filtering if flags are set
     filtered_meta = _apply_flags(args, system_meta, user_meta, meta_dict)
@@ -187,12 +229,9 @@ def handle_md_search(ckan_conn, args):
         print("⚠️ Please provide at least one search criterion (keyword, org, or group).")
         return
 
-    datasets = ckan_conn.list_all_datasets(include_private=True)
-    if not datasets:
-        print("⚠️ No datasets found on this CKAN instance.")
-        return
-
-    results = search_datasets(datasets, keywords, org, group, system)
+    # Let CKAN filter on organisation and group, keywords are matched locally
+    datasets = ckan_conn.iter_datasets(include_private=True, fq=build_filter_query(org, group))
+    results = search_datasets(datasets, keywords, org, group, system, limit=getattr(args, "limit", None))
     if not results:
         print("⚠️ No datasets found matching the given criteria.")
         return
@@ -205,6 +244,11 @@ def handle_md_search(ckan_conn, args):
 # Metadata update
 def handle_md_update(ckan_conn, args):
     """Update metadata for an existing dataset in CKAN using a JSON metafile."""
+    # pylint: disable=import-outside-toplevel
+    from ckanapi import ValidationError
+
+    from surfmeta.metadata_utils import load_and_validate_flat_json
+
     dataset_id = args.uuid
     metafile = args.metafile
 
@@ -233,14 +277,9 @@ def handle_md_update(ckan_conn, args):
         print(f"❌ Error reading metafile '{metafile}': {e}")
         return
 
-    # Convert new extras into dict form for merging
-    new_meta_dict = {e["key"]: e["value"] for e in new_extras}
-
-    # Extract existing extras as dict
-    existing_extras = {e["key"]: e["value"] for e in dataset.get("extras", []) if "key" in e and "value" in e}
-
-    # Merge — replace existing keys with new ones
-    merged_extras = {**existing_extras, **new_meta_dict}
+    # Merge into one dict — new keys replace existing ones
+    merged_extras = {e["key"]: e["value"] for e in dataset.get("extras", []) if "key" in e and "value" in e}
+    merged_extras.update((e["key"], e["value"]) for e in new_extras)
 
     # Convert back to CKAN-style list
     dataset["extras"] = [{"key": k, "value": str(v)} for k, v in merged_extras.items()]
@@ -260,6 +299,8 @@ def handle_md_update(ckan_conn, args):
 
 def handle_mdentry_delete_dataset(ckan_conn, dataset, args):
     """Delete the entire dataset."""
+    from ckanapi import NotAuthorized, NotFound  # pylint: disable=import-outside-toplevel
+
     try:
         ckan_conn.delete_dataset(dataset_id=args.uuid)
         print(f"✅ Dataset '{dataset['name']}' deleted successfully.")
@@ -273,6 +314,8 @@ def handle_mdentry_delete_dataset(ckan_conn, dataset, args):
 
 def handle_mdentry_delete_key(ckan_conn, args):
     """Delete a specific metadata key from a dataset."""
+    from ckanapi import NotAuthorized, NotFound  # pylint: disable=import-outside-toplevel
+
     try:
         ckan_conn.delete_metadata_item(dataset_id=args.uuid, key=args.key)
         print(f"✅ Metadata key '{args.key}' deleted from dataset '{args.uuid}'.")
@@ -1,14 +1,50 @@
 """DCacheManager: A class encapsulating dCache operations."""
 
 import json
+import random
+import re
 import shutil
 import subprocess
 import sys
-from datetime import datetime
+import time
+from functools import cached_property, lru_cache
 from pathlib import Path
+from typing import Optional
 
 from surfmeta.ckan_conf import CKANConf
-from surfmeta.utils import get_ckan_connection
+from surfmeta.utils import get_ckan_conf, get_ckan_connection
+
+# "<path> <ALGO>=<hex>" as printed by `ada --checksum`
+_CHECKSUM_RE = re.compile(r"\s(\w+)=([0-9a-fA-F]+)\s*$", re.MULTILINE)
+# Seconds the listener reuses its copy of the CKAN datasets before fetching them again
+DATASETS_CACHE_TTL = 60
+# Minimum age in seconds of that copy before a path missing from it triggers a new fetch
+DATASETS_MISS_REFRESH = 5
+# Attempts for a CKAN update from the listener before the event is given up
+PATCH_RETRIES = 4
+# ckanapi reports unexpected HTTP statuses as "['<url>', <status>, '<response body>']"
+_CKAN_STATUS_RE = re.compile(r"\['[^']*', (\d{3}),")
+# (auth type, auth file, mtime) combinations that passed _validate_auth in this process
+_VALIDATED_AUTH: set[tuple[str, Path, int]] = set()
+# Errors reported by `ada --events`
+_NOT_A_DIR_RE = re.compile(r"ERROR: .* is not a directory")
+_CHANNEL_USED_RE = re.compile(r"channel name '([^']+)' is already used")
+
+
+@lru_cache(maxsize=None)
+def _resolve_tool(name: str):
+    """Return the absolute path of a command line tool, None if it is not installed."""
+    return shutil.which(name)
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Whether a failed CKAN call may succeed when repeated: network errors, 429 and 5xx."""
+    cause = exc.__cause__ or exc
+    # Connection and timeout errors of requests (used by ckanapi) are OSErrors
+    if isinstance(cause, OSError):
+        return True
+    status = _CKAN_STATUS_RE.search(str(cause))
+    return bool(status) and (status.group(1) == "429" or status.group(1).startswith("5"))
 
 
 class DCache:
@@ -16,7 +52,7 @@ class DCache:
 
     REQUIRED_TOOLS = ("ada", "get-macaroon")
 
-    def __init__(self, ckan_conf: CKANConf = CKANConf()):
+    def __init__(self, ckan_conf: Optional[CKANConf] = None):
         """Initialise the dCache connector.
 
         Loads CKAN configuration, establishes a CKAN connection, checks that
@@ -27,7 +63,7 @@ class DCache:
         Parameters
         ----------
         ckan_conf : CKANConf, optional
-            CKAN configuration object. A default instance is used if none is provided.
+            CKAN configuration object. The cached current configuration is used if none is provided.
 
         Raises
         ------
@@ -37,8 +73,10 @@ class DCache:
             If the authentication file does not exist.
 
         """
-        self.ckan_conf = ckan_conf
+        self.ckan_conf = ckan_conf if ckan_conf is not None else get_ckan_conf()
         self.ckan = get_ckan_connection()
+        self._datasets: list[dict] = []
+        self._datasets_fetched = float("-inf")
         self._require_dcache_tools()
         try:
             self.auth_type, self.auth_file = self.ckan_conf.get_dcache_auth()
@@ -54,7 +92,7 @@ class DCache:
     # Tool Requirements
     # ------------------------------------------------------------------
     def _require_dcache_tools(self):
-        missing = [tool for tool in self.REQUIRED_TOOLS if not shutil.which(tool)]
+        missing = [tool for tool in self.REQUIRED_TOOLS if not _resolve_tool(tool)]
         if missing:
             print(f"❌ Missing required tools: {', '.join(missing)}")
             sys.exit(1)
@@ -62,22 +100,29 @@ class DCache:
     # ------------------------------------------------------------------
     # Internal Helper
     # ------------------------------------------------------------------
-    def _run_dcache_cmd(self, ada_args: list[str]) -> str:
-        if not self.auth_file.exists():
-            raise RuntimeError(f"Authentication file not found: {self.auth_file}")
-
-        cmd = ["ada"]
+    @cached_property
+    def _ada_prefix(self) -> tuple[str, ...]:
+        """The ada executable and auth options, which do not change for an instance."""
         if self.auth_type == "macaroon":
-            cmd += ["--tokenfile", str(self.auth_file)]
+            auth_option = "--tokenfile"
         elif self.auth_type == "netrc":
-            cmd += ["--netrc", str(self.auth_file)]
+            auth_option = "--netrc"
         else:
             raise RuntimeError(f"Unknown authentication type: {self.auth_type}")
+        return (_resolve_tool("ada") or "ada", auth_option, str(self.auth_file))
+
+    def _ada_cmd(self, ada_args: list[str]) -> list[str]:
+        """Build the ada command line with the configured authentication."""
+        return [*self._ada_prefix, *ada_args]
 
-        cmd += ada_args
+    def _run_dcache_cmd(self, ada_args: list[str], capture: bool = True) -> str:
+        # The auth file is checked once in _validate_auth; ada reports it if it disappears later
+        cmd = self._ada_cmd(ada_args)
         print("Running ADA command:", " ".join(cmd))
-        result = subprocess.run(cmd, check=False, text=True, capture_output=True)
-        stdout = result.stdout.strip()
+        # Commands whose output is not used send stdout straight to /dev/null
+        stdout_dest = subprocess.PIPE if capture else subprocess.DEVNULL
+        result = subprocess.run(cmd, check=False, text=True, stdout=stdout_dest, stderr=subprocess.PIPE)
+        stdout = result.stdout.strip() if capture else ""
         stderr = result.stderr.strip()
 
         if stderr:
@@ -90,16 +135,22 @@ class DCache:
     # ------------------------------------------------------------------
     def _validate_auth(self, silent = True):
         """Private: Check whether the current CKAN config authentication works."""
-        if not self.auth_file.exists():
-            raise FileNotFoundError(f"Authentication file not found: {self.auth_file}")
+        try:
+            auth_key = (self.auth_type, self.auth_file, self.auth_file.stat().st_mtime_ns)
+        except OSError as exc:
+            raise FileNotFoundError(f"Authentication file not found: {self.auth_file}") from exc
+        # An unchanged auth file that already passed does not need another ada round trip
+        if silent and auth_key in _VALIDATED_AUTH:
+            return
 
         try:
             # Test authentication by listing the root directory
-            self._run_dcache_cmd(["--list", "."])
+            self._run_dcache_cmd(["--list", "."], capture=False)
             if not silent:
                 print(f"✅ {self.auth_type} authentication is valid.")
         except RuntimeError as exc:
             raise RuntimeError(f"Authentication test failed: {exc}") from exc
+        _VALIDATED_AUTH.add(auth_key)
 
     @classmethod
     def set_auth(cls, ckan_conf: CKANConf, method: str, file_path: Path):
@@ -154,7 +205,7 @@ class DCache:
             Label to apply, by default "test-ckan".
 
         """
-        self._run_dcache_cmd(["--setlabel", str(dcache_path), label])
+        self._run_dcache_cmd(["--setlabel", str(dcache_path), label], capture=False)
         print(f"✅ Label '{label}' set successfully on '{dcache_path}'")
 
     def get_stat(self, dcache_path: Path) -> dict:
@@ -174,6 +225,12 @@ class DCache:
         out = self._run_dcache_cmd(["--stat", str(dcache_path)])
         return json.loads(out)
 
+    def _has_label(self, dcache_path: str, label: str) -> bool:
+        """Check whether a dCache path carries a label, parsing the stat JSON only if it can."""
+        out = self._run_dcache_cmd(["--stat", str(dcache_path)])
+        # The label text must occur in the raw output for it to be among the labels
+        return label in out and label in json.loads(out).get("labels", [])
+
     def get_checksum(self, dcache_path: Path) -> tuple[str, str]:
         """Retrieve the checksum of a dCache file.
 
@@ -194,11 +251,10 @@ class DCache:
 
         """
         out = self._run_dcache_cmd(["--checksum", str(dcache_path)])
-        for line in out.splitlines():
-            if "=" in line:
-                algo, checksum = line.strip().split()[1].split("=")
-                return [algo, checksum]
-        raise KeyError("Checksum not found in output.")
+        match = _CHECKSUM_RE.search(out)
+        if not match:
+            raise KeyError("Checksum not found in output.")
+        return match.group(1), match.group(2)
 
     # ------------------------------------------------------------------
     # Event Listening
@@ -228,44 +284,44 @@ class DCache:
             For unexpected ADA output or other unhandled errors.
 
         """
-        cmd = ["ada"]
-        if self.auth_type == "macaroon":
-            cmd += ["--tokenfile", str(self.auth_file)]
-        else:
-            cmd += ["--netrc", str(self.auth_file)]
-        cmd += ["--events", channel, str(dcache_path)]
+        cmd = self._ada_cmd(["--events", channel, str(dcache_path)])
 
         print(f"🎧 Listening to dCache events on '{dcache_path}' (channel: {channel}) …")
         previous_move = None
 
         try:
-            line = ""
+            last_line = ""
             with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True) as proc:
                 for line in proc.stdout:
                     line = line.strip()
                     if not line:
                         continue
+                    last_line = line
                     if "IN_MOVED_FROM" in line:
                         previous_move = self._parse_inotify_path(line)
                     elif "IN_MOVED_TO" in line:
                         event_path = self._parse_inotify_path(line)
-                        labels = self.get_stat(event_path)["labels"]
-                        if previous_move and "test-ckan" in labels:
+                        # Only a move with a known source needs the (ada subprocess) stat call
+                        if previous_move and self._has_label(event_path, "test-ckan"):
                             self._update_ckan_location(previous_move, event_path)
                             previous_move = None
                     elif "IN_DELETE" in line:
                         event_path = self._parse_inotify_path(line)
                         print(f"🔴 Detected delete: {event_path}")
                         self._dcache_warning_ckan(event_path)
-            # some fails
-            if "is not a directory." in line:
-                raise NotADirectoryError(line)
-            if "ERROR: channel name 'tokenchannel' is already used." in line:
+                returncode = proc.wait()
+            # some fails; ada prints its error as the last line
+            if returncode == 0 and "ERROR:" not in last_line:
+                return
+            if _NOT_A_DIR_RE.search(last_line):
+                raise NotADirectoryError(last_line)
+            channel_used = _CHANNEL_USED_RE.search(last_line)
+            if channel_used:
                 raise KeyError(
-                    f"ERROR: channel name {channel} is already used. For delete see surfmeta dcache ada-help."
+                    f"ERROR: channel name {channel_used.group(1)} is already used. "
+                    "For delete see surfmeta dcache ada-help."
                 )
-            if line != "":
-                raise Exception(line) # pylint: disable=broad-exception-raised
+            raise Exception(last_line or f"ada exited with code {returncode}") # pylint: disable=broad-exception-raised
         except KeyboardInterrupt:
             print("\n🛑 Listener stopped by user.")
             self._delete_channel(channel)
@@ -284,55 +340,125 @@ class DCache:
     # ------------------------------------------------------------------
     # CKAN Integration
     # ------------------------------------------------------------------
+    def _fetch_datasets(self):
+        """Replace the local copy of the datasets with the current CKAN listing."""
+        self._datasets = self.ckan.list_all_datasets(include_private=True)
+        self._datasets_fetched = time.monotonic()
+
+    def _find_datasets(self, dcache_path: str) -> list[dict]:
+        """Find the CKAN datasets for a dCache path in a recently fetched copy of all datasets.
+
+        A path missing from the copy may belong to a dataset registered after it was
+        fetched, so CKAN is asked again; at most once per DATASETS_MISS_REFRESH
+        seconds, so a burst of events for unregistered paths does not flood CKAN.
+        """
+        from surfmeta.ckan import match_dcache_path  # pylint: disable=import-outside-toplevel
+
+        age = time.monotonic() - self._datasets_fetched
+        if age >= DATASETS_CACHE_TTL:
+            self._fetch_datasets()
+            return match_dcache_path(self._datasets, dcache_path)
+
+        matches = match_dcache_path(self._datasets, dcache_path)
+        if not matches and age >= DATASETS_MISS_REFRESH:
+            self._fetch_datasets()
+            matches = match_dcache_path(self._datasets, dcache_path)
+        return matches
+
+    def _store_dataset(self, dataset: dict):
+        """Replace a dataset in the local copy with the version CKAN returned after an update."""
+        for idx, known in enumerate(self._datasets):
+            if known.get("id") == dataset.get("id"):
+                self._datasets[idx] = dataset
+                return
+
+    def _patch_extras(self, dataset_id: str, extras: list[dict]) -> dict:
+        """Patch dataset extras, retrying transient CKAN failures with exponential backoff.
+
+        The full extras list is sent, so repeating the call is safe. Errors that
+        will not go away by waiting (authorisation, validation, ...) are raised at once.
+        """
+        from httpx import HTTPError  # pylint: disable=import-outside-toplevel
+
+        for attempt in range(PATCH_RETRIES - 1):
+            try:
+                return self.ckan.patch_extras(dataset_id, extras)
+            except HTTPError as exc:
+                if not _is_transient(exc):
+                    raise
+                time.sleep(min(2**attempt, 8) + random.random())
+        # Last attempt: let the error reach the caller
+        return self.ckan.patch_extras(dataset_id, extras)
+
+    def _current_match(self, dataset_id: str, dcache_path: str) -> Optional[dict]:
+        """Read a dataset from CKAN again and match its location against a dCache path.
+
+        The local copy only tells which datasets to update. package_patch replaces
+        all extras, so they are built from the current version of the dataset;
+        changes other clients made since the copy was fetched are kept.
+        """
+        from surfmeta.ckan import match_dcache_path  # pylint: disable=import-outside-toplevel
+
+        dataset = self.ckan.get_dataset_info(dataset_id)
+        self._store_dataset(dataset)
+        matches = match_dcache_path([dataset], dcache_path)
+        if not matches:
+            print(f"⚠️ Location of dataset '{dataset_id}' no longer ends with {dcache_path}, skipping.")
+            return None
+        return matches[0]
+
     def _update_ckan_location(self, old_path: str, new_path: str, verbose: bool = False):
-        matches = self.ckan.find_dataset_by_dcache_path(old_path)
+        matches = self._find_datasets(old_path)
         if not matches:
             print(f"⚠️ No CKAN dataset found for path: {old_path}")
             return
 
         for match in matches:
-            dataset = match["dataset"]
-            dataset_id = dataset["name"]
-            extras = dataset.get("extras", [])
+            dataset_id = match["dataset"]["name"]
+            try:
+                current = self._current_match(dataset_id, old_path)
+                if current is None:
+                    continue
+                extras = current["dataset"].get("extras", [])
+                # find_dataset_by_dcache_path hands back the matching location extra itself
+                location_extra = current["location"]
 
-            old_location = next((ex["value"] for ex in extras if ex.get("key") == "location"), None)
-            new_location = old_location.replace(old_path, new_path)
+                # match_dcache_path only returns locations ending with the dCache path; swap that suffix
+                old_location = location_extra["value"]
+                new_location = old_location[: -len(old_path)] + new_path
 
-            if verbose:
-                print(f"🔄 Updating dataset '{dataset_id}': {old_location} -> {new_location}")
+                if verbose:
+                    print(f"🔄 Updating dataset '{dataset_id}': {old_location} -> {new_location}")
 
-            updated_extras = [
-                {"key": "location", "value": new_location} if ex.get("key") == "location" else ex
-                for ex in extras
-            ]
-            dataset["extras"] = updated_extras
+                updated_extras = list(extras)
+                updated_extras[extras.index(location_extra)] = {"key": "location", "value": new_location}
 
-            try:
-                self.ckan.update_dataset(dataset)
+                # Only the extras are sent, not the resources and other fields
+                self._store_dataset(self._patch_extras(dataset_id, updated_extras))
                 print(f"✅ Successfully updated location for dataset '{dataset_id}'.")
             except Exception as e:
                 print(f"❌ Failed to update dataset '{dataset_id}': {e}")
 
     def _dcache_warning_ckan(self, event_path: str):
-        matches = self.ckan.find_dataset_by_dcache_path(event_path)
+        matches = self._find_datasets(event_path)
         if not matches:
             print(f"⚠️ No CKAN dataset found for path: {event_path}")
             return
 
+        # One timestamp for the event, shared by all matching datasets
+        timestamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
         for match in matches:
-            dataset = match["dataset"]
-            dataset_id = dataset["name"]
+            dataset_id = match["dataset"]["name"]
 
-            timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
             key = f"!!!DELETED_WARNING_{timestamp}"
             value = f"❌ File deleted from dCache: {event_path} at {timestamp}"
 
-            existing_extras = dataset.get("extras", [])
-            existing_extras.append({"key": key, "value": value})
-            dataset["extras"] = existing_extras
-
             try:
-                self.ckan.update_dataset(dataset)
+                current = self._current_match(dataset_id, event_path)
+                if current is None:
+                    continue
+                extras = [*current["dataset"].get("extras", []), {"key": key, "value": value}]
+                self._store_dataset(self._patch_extras(dataset_id, extras))
                 print(f"✅ CKAN dataset '{dataset_id}' updated with deletion warning.")
             except Exception as e:
                 print(f"❌ Failed to update CKAN dataset '{dataset_id}': {e}")
@@ -342,5 +468,5 @@ class DCache:
     # ------------------------------------------------------------------
     def _parse_inotify_path(self, event_line: str) -> str:
         """Extract path from an inotify event line (regular method)."""
-        parts = event_line.rsplit()
-        return parts[1].strip()
+        # Only the second field is needed, so stop splitting after it
+        return event_line.split(maxsplit=2)[1]
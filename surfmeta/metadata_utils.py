@@ -1,8 +1,9 @@
 """Metadata functions."""
 
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Dict, List
 
 from surfmeta.system_metadata import SYSTEMS, local_meta, rsc_meta, snellius_meta, spider_meta
 from surfmeta.utils import get_system_info
@@ -16,17 +17,24 @@ PROVO = [
     "prov:SoftwareAgent",
 ]
 
+# Exact value types allowed in a flat metafile (lists may only contain these).
+# json only produces these exact types, so a set lookup replaces isinstance.
+_SIMPLE_TYPES = frozenset({str, int, float, bool, type(None)})
+# Characters a JSON document can start with (including NaN/Infinity and whitespace)
+_JSON_FIRST_CHARS = frozenset('[{"-0123456789tfnNI \t\r\n')
+
 
 def get_sys_meta() -> dict:
     """Lookup the system and create the metadata."""
-    system = [name for name in SYSTEMS if name in get_system_info()]
-    if len(system) == 0:
+    host = get_system_info()
+    system = next((name for name in SYSTEMS if name in host), None)
+    if system is None:
         sys_meta = local_meta()
-    elif system[0] == "snellius":
+    elif system == "snellius":
         sys_meta = snellius_meta()
-    elif system[0] == "spider":
+    elif system == "spider":
         sys_meta = spider_meta()
-    elif system[0] in ["src-surf-hosted-nl", "src.surf-hosted.nl"]:
+    elif system in ("src-surf-hosted-nl", "src.surf-hosted.nl"):
         sys_meta = rsc_meta()
     else:
         sys_meta = {}
@@ -56,41 +64,43 @@ def load_and_validate_flat_json(json_path: Path) -> List[Dict[str, str]]:
         OSError: If the file cannot be read.
 
     """
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    # Parse straight from bytes; json detects the UTF encoding itself
+    with open(json_path, "rb") as f:
+        data = json.loads(f.read())
 
     # Ensure root is a dict
     if not isinstance(data, dict):
         raise ValueError(f"Metafile '{json_path}' must contain a JSON object (key-value pairs).")
 
-    def is_simple_value(v: Any) -> bool:
-        """Check if value is a simple type or list of simple types."""
-        if isinstance(v, (str, int, float, bool)) or v is None:
-            return True
-        if isinstance(v, list):
-            return all(isinstance(i, (str, int, float, bool)) or i is None for i in v)
-        return False
-
-    # Validate and build CKAN-style pairs
+    # Validate and build CKAN-style pairs in a single pass
     extras = []
     for key, value in data.items():
-        if not is_simple_value(value):
+        value_type = type(value)
+        if value_type in _SIMPLE_TYPES:
+            value_str = str(value) if value is not None else ""
+        elif value_type is list and all(type(i) in _SIMPLE_TYPES for i in value):
+            value_str = json.dumps(value)  # e.g. ["md5", "15f8..."]
+        else:
             raise ValueError(
                 f"Metafile '{json_path}' contains unsupported nested structures for key: '{key}'. "
                 "Only primitive types or lists of primitives are allowed."
             )
 
-        # Convert lists to JSON string; primitives to str
-        if isinstance(value, list):
-            value_str = json.dumps(value)  # e.g. ["md5", "15f8..."]
-        else:
-            value_str = str(value) if value is not None else ""
-
         extras.append({"key": key, "value": value_str})
 
     return extras
 
 
+def _stringify_extra(value) -> str:
+    """Convert a system metadata value to its CKAN extras string."""
+    # Most system metadata values are already strings
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (tuple, list)):
+        return json.dumps(value)
+    return str(value)
+
+
 def merge_ckan_metadata(meta: dict, sys_meta: dict, extras: list[dict]) -> dict:
     """Merge main metadata, system metadata, and user extras into a CKAN-ready metadata dict.
 
@@ -109,27 +119,11 @@ def merge_ckan_metadata(meta: dict, sys_meta: dict, extras: list[dict]) -> dict:
         CKAN-ready metadata dictionary with merged 'extras'.
 
     """
-    # Start with a copy of meta to avoid mutating the original
-    metadata = dict(meta)
-
-    # Initialize extras list
-    merged_extras = list(metadata.get("extras", []))  # existing extras in meta
-
     # Convert sys_meta items into CKAN extras format
-    for key, value in sys_meta.items():
-        if isinstance(value, (tuple, list)):
-            value_str = json.dumps(value)
-        else:
-            value_str = str(value)
-        merged_extras.append({"key": key, "value": value_str})
+    sys_extras = [{"key": key, "value": _stringify_extra(value)} for key, value in sys_meta.items()]
 
-    # Add user-provided extras
-    merged_extras.extend(extras)
-
-    # Set merged extras back
-    metadata["extras"] = merged_extras
-
-    return metadata
+    # Existing extras in meta, then system metadata, then user-provided extras
+    return {**meta, "extras": [*meta.get("extras", []), *sys_extras, *extras]}
 
 
 def input_metadata_extras() -> tuple[dict, dict]:
@@ -156,21 +150,25 @@ def input_metadata_extras() -> tuple[dict, dict]:
 
 
 def _flatten_value_for_search(value):
-    """Recursively flatten a value (str, list, dict) into lowercase strings."""
+    """Flatten a value (str, list, dict) into lowercase strings, in document order."""
     if isinstance(value, str):
         return [value.lower()]
-    if isinstance(value, list):
-        result = []
-        for v in value:
-            result.extend(_flatten_value_for_search(v))
-        return result
-    if isinstance(value, dict):
-        result = []
-        for k, v in value.items():
-            result.append(str(k).lower())
-            result.extend(_flatten_value_for_search(v))
-        return result
-    return [str(value).lower()]
+    result = []
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            result.append(item.lower())
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, dict):
+            # Push reversed so each key is popped right before its value
+            for k, v in reversed(item.items()):
+                stack.append(v)
+                stack.append(str(k))
+        else:
+            result.append(str(item).lower())
+    return result
 
 
 def normalize_extras_for_search(extras):
@@ -185,13 +183,27 @@ def normalize_extras_for_search(extras):
         if key:
             meta_key_and_values.append(str(key).lower())
 
-        # Try to parse JSON values, fallback to string
-        try:
-            parsed = json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            parsed = value
-
         # Flatten values (list, dict, etc.) into strings
-        meta_key_and_values.extend(_flatten_value_for_search(parsed))
+        if isinstance(value, str):
+            meta_key_and_values.extend(_normalize_text_for_search(value))
+        else:
+            meta_key_and_values.extend(_flatten_value_for_search(value))
 
     return meta_key_and_values
+
+
+@lru_cache(maxsize=4096)
+def _normalize_text_for_search(value: str) -> tuple[str, ...]:
+    """Parse a (possibly JSON encoded) extras value into lowercase strings.
+
+    Extras values repeat a lot across datasets (system names, protocols, ...),
+    so the parsed and flattened result is cached per value.
+    """
+    # Plain text cannot be JSON; skip the parse attempt (and its exception) for it
+    if value[:1] not in _JSON_FIRST_CHARS:
+        return (value.lower(),)
+    try:
+        parsed = json.loads(value)
+    except json.JSONDecodeError:
+        parsed = value
+    return tuple(_flatten_value_for_search(parsed))
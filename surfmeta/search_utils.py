@@ -1,69 +1,116 @@
 """Search helpers."""
 
+import re
+from functools import lru_cache
+from itertools import islice
+
 from surfmeta.metadata_utils import normalize_extras_for_search
 
 
+@lru_cache(maxsize=32)
+def _keyword_pattern(keywords: tuple) -> re.Pattern:
+    """Compile one case-insensitive pattern that matches any of the keywords."""
+    return re.compile("|".join(re.escape(k) for k in keywords), re.IGNORECASE)
+
+
+def _build_haystack(dataset) -> str:
+    """Combine title, name, and flattened extras into one lowercase search text."""
+    title = dataset.get("title", "")
+    name = dataset.get("name", "")
+    return " ".join([title.lower(), name.lower()] + normalize_extras_for_search(dataset.get("extras", [])))
+
+
 def _dataset_matches(dataset, keywords=None, org_filter="", group_filter="", system_filter=""):
     """Check if a dataset matches keyword, org, and group filters."""
-    keywords = [k.lower() for k in keywords] if keywords else []
     org_filter = (org_filter or "").lower()
     group_filter = (group_filter or "").lower()
     system_filter = (system_filter or "").lower()
 
-    title = dataset.get("title", "")
-    name = dataset.get("name", "")
     org = dataset.get("organization", {}).get("name", "")
-    groups = [g.get("name", "") for g in dataset.get("groups", [])]
-    extras = dataset.get("extras", [])
-    if extras:
-        system = next((item["value"] for item in extras if item["key"] == "system_name"), None)
-    else:
-        system = None
-    # Combine title, name, and flattened extras for keyword search
-    combined_text = " ".join([title, name] + normalize_extras_for_search(extras))
-
-    if keywords and not any(keyword in combined_text for keyword in keywords):
-        return False
+
+    # Cheap filters first, so a mismatch never touches the extras text
     if org_filter and org_filter != org.lower():
         return False
-    if group_filter and group_filter not in [g.lower() for g in groups]:
-        return False
-    # local data does not have a system name, system can be None and []
-    if system_filter and not system and system_filter not in ["local", "localhost"]:
-        return False
-    if system_filter and system and system_filter != system.lower():
+    if group_filter and not any(g.get("name", "").lower() == group_filter for g in dataset.get("groups", [])):
         return False
+    if system_filter:
+        # local data does not have a system name, system can be None and []
+        system = _system_name(dataset) if dataset.get("extras") else None
+        if not system and system_filter not in ["local", "localhost"]:
+            return False
+        if system and system_filter != system.lower():
+            return False
+
+    if keywords:
+        pattern = _keyword_pattern(tuple(keywords))
+        # Title and name hits do not need the (expensive) flattened extras
+        if not (
+            pattern.search(dataset.get("title", ""))
+            or pattern.search(dataset.get("name", ""))
+            or pattern.search(_build_haystack(dataset))
+        ):
+            return False
 
     return True
 
 
+def _system_name(dataset, default=None):
+    """Return the system_name extra of a dataset."""
+    return next((item["value"] for item in dataset["extras"] if item["key"] == "system_name"), default)
+
+
 def print_dataset_results(datasets):
     """Nicely format and print CKAN dataset search results."""
     if not datasets:
         print("⚠️ No datasets found.")
         return
 
-    # Compute max lengths for alignment
-    max_title_len = max(len(ds.get("title", "<no title>")) for ds in datasets)
-    max_name_len = max(len(ds.get("name", "<no uuid>")) for ds in datasets)
-    max_org_len = max(len(ds.get("organization", {}).get("name", "<no org>")) for ds in datasets)
+    # Collect the printed fields once, then size the columns from them
+    rows = [
+        (
+            ds.get("title", "<no title>"),
+            ds.get("name", "<no uuid>"),
+            ds.get("organization", {}).get("name", "<no org>"),
+            _system_name(ds, "local or not defined"),
+        )
+        for ds in datasets
+    ]
+    # The system column is last and needs no padding
+    max_title_len, max_name_len, max_org_len = (
+        max(map(len, col)) for col in zip(*(row[:3] for row in rows))
+    )
 
     header = f"{'Title':<{max_title_len}}  {'UUID':<{max_name_len}}  {'Organization':<{max_org_len}}  System"
-    print(header)
-    print("-" * len(header))
+    lines = [header, "-" * len(header)]
+    lines.extend(
+        f"{title:<{max_title_len}}  {name:<{max_name_len}}  {org:<{max_org_len}}  {system_name}"
+        for title, name, org, system_name in rows
+    )
+
+    # Emit the whole table in a single write
+    print("\n".join(lines))
+
+
+def _solr_phrase(value: str) -> str:
+    """Quote a value for a Solr query, escaping the characters special inside quotes."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
 
-    for ds in datasets:
-        system_name = next(
-            (item["value"] for item in ds["extras"] if item["key"] == "system_name"), "local or not defined"
-        )
 
-        title = ds.get("title", "<no title>")
-        name = ds.get("name", "<no uuid>")
-        org = ds.get("organization", {}).get("name", "<no org>")
+def build_filter_query(org=None, group=None) -> str:
+    """Build a CKAN filter query so the server only returns datasets in org and group."""
+    filters = []
+    if org:
+        filters.append(f"organization:{_solr_phrase(org.lower())}")
+    if group:
+        filters.append(f"groups:{_solr_phrase(group.lower())}")
+    return " AND ".join(filters)
 
-        print(f"{title:<{max_title_len}}  {name:<{max_name_len}}  {org:<{max_org_len}}  {system_name}")
 
+def search_datasets(datasets, keyword=None, org=None, group=None, system=None, limit=None):
+    """Return a list of datasets matching given filters.
 
-def search_datasets(datasets, keyword=None, org=None, group=None, system=None):
-    """Return a list of datasets matching given filters."""
-    return [ds for ds in datasets if _dataset_matches(ds, keyword, org, group, system)]
+    The datasets are consumed lazily; with a limit, iteration stops as soon as
+    enough matches are found.
+    """
+    matches = (ds for ds in datasets if _dataset_matches(ds, keyword, org, group, system))
+    return list(islice(matches, limit))
@@ -5,7 +5,8 @@ from pathlib import Path
 
 from surfmeta.utils import calculate_local_checksum, calculate_remote_checksum, get_system_info
 
-SYSTEMS = ["snellius", "spider", "src-surf-hosted-nl", "src.surf-hosted.nl"]
+# Matched as substrings of the host name, in this order
+SYSTEMS = ("snellius", "spider", "src-surf-hosted-nl", "src.surf-hosted.nl")
 
 
 def local_meta():
@@ -50,7 +51,8 @@ def meta_checksum(
     remote: bool = False,
     host: str | None = None,
     username: str | None = None,
-    algorithm: str = "md5",
+    algorithm: str = "sha256",
+    use_cache: bool = False,
 ) -> dict:
     """Add file path and checksum to metadata.
 
@@ -63,7 +65,11 @@ def meta_checksum(
         remote (bool): If True, calculate checksum remotely.
         host (str): Remote host (required if remote=True).
         username (str): SSH username (required if remote=True).
-        algorithm (str): Hash algorithm (default: 'md5').
+        algorithm (str): Hash algorithm (default: 'sha256', which uses the CPU's SHA
+            extensions where available). 'md5' is still accepted; checksums stored
+            earlier stay valid because the algorithm name is saved with the digest.
+        use_cache (bool): Reuse the cached checksum of a local file whose mtime and size
+            did not change, instead of reading its contents (default: False).
 
     Returns:
     -------
@@ -73,7 +79,7 @@ def meta_checksum(
     if not remote:
         # ✅ Local calculation
         if file_path.is_file():
-            meta["checksum"] = (algorithm, calculate_local_checksum(file_path, algorithm))
+            meta["checksum"] = (algorithm, calculate_local_checksum(file_path, algorithm, use_cache))
             meta["location"] = str(file_path)
             return meta
         warnings.warn(f"{str(file_path)} not a file. Cannot create checksum.")
@@ -4,17 +4,76 @@ import hashlib
 import json
 import os
 import platform
+import posixpath
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from surfmeta.ckan import Ckan
-from surfmeta.ckan_conf import CKANConf
+from surfmeta.ckan_conf import CKAN_CONFIG_FP, CKANConf
+
+if TYPE_CHECKING:
+    from surfmeta.ckan import Ckan
+
+# Reuse one SSH connection per user and host for repeated remote commands;
+# %C is a hash of the connection, so the socket path stays short
+SSH_MULTIPLEX_OPTIONS = (
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/cm-%C",
+    "-o", "ControlPersist=60s",
+)
+
+CHECKSUM_CACHE_FP = Path.home() / ".cache" / "surfmeta" / "checksums.sqlite"
+CHECKSUM_CACHE_MAX_ENTRIES = 100_000
+
+
+def _ssh_multiplex_options() -> tuple[str, ...]:
+    """Return SSH_MULTIPLEX_OPTIONS where ssh can use them, no options otherwise.
+
+    Windows OpenSSH does not support ControlMaster, and ssh cannot create the
+    control socket if ~/.ssh does not exist.
+    """
+    if sys.platform == "win32" or not (Path.home() / ".ssh").is_dir():
+        return ()
+    return SSH_MULTIPLEX_OPTIONS
+
+
+def _config_mtime():
+    """Return the modification time of the ckan config, None if it does not exist yet."""
+    try:
+        return CKAN_CONFIG_FP.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=1)
+def _load_ckan_conf(mtime) -> CKANConf:  # pylint: disable=unused-argument
+    """Read and validate the ckan config, again only when its mtime changed."""
+    return CKANConf()
+
+
+@lru_cache(maxsize=None)
+def _connect_ckan(url: str, token: str) -> "Ckan":
+    """Create (and authenticate) one ckan connection per url and token.
+
+    The connection keeps its HTTP session, so later calls reuse the socket.
+    """
+    from surfmeta.ckan import Ckan  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+    return Ckan(url, token)
+
+
+def get_ckan_conf() -> CKANConf:
+    """Return the current ckan config, parsed once until the file changes."""
+    return _load_ckan_conf(_config_mtime())
 
 
 def get_ckan_connection():
     """Instantiate the ckan connection from the current ckan config."""
-    conf = CKANConf()
+    conf = get_ckan_conf()
     url = conf.cur_ckan
     _, entry = conf.get_entry(url)
 
@@ -22,7 +81,7 @@ def get_ckan_connection():
         print(f"AUTHENTICATION ERROR: no token provided for {url}.")
         sys.exit(1)
 
-    return Ckan(url, entry["token"])
+    return _connect_ckan(url, entry["token"])
 
 
 def get_system_info():
@@ -31,30 +90,181 @@ def get_system_info():
     return platform_info
 
 
-def calculate_local_checksum(file_path: Path, algorithm: str = "sha256") -> str:
+def read_json_cache(cache_fp: Path) -> dict:
+    """Read an on-disk JSON cache, empty if missing or invalid."""
+    try:
+        with open(cache_fp, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def write_json_cache(cache_fp: Path, cache: dict):
+    """Write an on-disk JSON cache; failing to do so is not an error.
+
+    The cache is written to a temporary file that replaces the old one, so
+    readers never see a half-written file.
+    """
+    try:
+        cache_fp.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=cache_fp.parent, delete=False) as f:
+            json.dump(cache, f)
+        os.replace(f.name, cache_fp)
+    except OSError:
+        pass
+
+
+def _open_checksum_cache():
+    """Open the SQLite checksum cache, creating the database and table if needed."""
+    import sqlite3  # pylint: disable=import-outside-toplevel
+
+    CHECKSUM_CACHE_FP.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(CHECKSUM_CACHE_FP, timeout=10)
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS checksums ("
+            "algorithm TEXT, path TEXT, mtime_ns INTEGER, size INTEGER, digest TEXT, "
+            "PRIMARY KEY (algorithm, path))"
+        )
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def _prune_checksum_cache(conn):
+    """Drop entries of files that no longer exist, then the least recently stored ones."""
+    count = conn.execute("SELECT COUNT(*) FROM checksums").fetchone()[0]
+    if count <= CHECKSUM_CACHE_MAX_ENTRIES:
+        return
+    rows = conn.execute("SELECT algorithm, path FROM checksums").fetchall()
+    conn.executemany(
+        "DELETE FROM checksums WHERE algorithm = ? AND path = ?",
+        [row for row in rows if not os.path.exists(row[1])],
+    )
+    # Trim below the limit, so the next writes do not have to prune again;
+    # INSERT OR REPLACE gives a stored entry a new, highest rowid
+    count = conn.execute("SELECT COUNT(*) FROM checksums").fetchone()[0]
+    excess = count - CHECKSUM_CACHE_MAX_ENTRIES * 3 // 4
+    if excess > 0:
+        conn.execute(
+            "DELETE FROM checksums WHERE rowid IN (SELECT rowid FROM checksums ORDER BY rowid LIMIT ?)",
+            (excess,),
+        )
+
+
+@lru_cache(maxsize=None)
+def _check_algorithm(algorithm: str):
+    """Raise a ValueError if hashlib does not know the algorithm; valid ones are remembered."""
+    try:
+        hashlib.new(algorithm)
+    except ValueError as e:
+        raise ValueError(f"Unsupported hash algorithm: {algorithm}") from e
+
+
+def _hash_file(file_path: Path, algorithm: str) -> str:
+    """Hash a file; file_digest hashes in C with a large buffer and releases the GIL."""
+    with file_path.open("rb") as f:
+        return hashlib.file_digest(f, algorithm).hexdigest()
+
+
+def _cached_checksums(file_paths: list[Path], algorithm: str, hash_files) -> dict[Path, str]:
+    """Look up checksums in the cache and hash only new or changed files.
+
+    Entries are keyed on algorithm and resolved path and are only reused while
+    the file's mtime and size are unchanged. Only the rows of the given files are
+    read and new entries are stored in one transaction, so concurrent runs keep
+    each other's entries. A cache that cannot be used is not an error.
+    """
+    import sqlite3  # pylint: disable=import-outside-toplevel
+
+    stats = {path: path.stat() for path in file_paths}
+    keys = {path: str(path.resolve()) for path in file_paths}
+
+    digests = {}
+    conn = None
+    try:
+        conn = _open_checksum_cache()
+        for path in file_paths:
+            row = conn.execute(
+                "SELECT mtime_ns, size, digest FROM checksums WHERE algorithm = ? AND path = ?",
+                (algorithm, keys[path]),
+            ).fetchone()
+            if row and row[:2] == (stats[path].st_mtime_ns, stats[path].st_size):
+                digests[path] = row[2]
+    except (OSError, sqlite3.Error):
+        pass
+
+    try:
+        missing = [path for path in file_paths if path not in digests]
+        if missing:
+            digests.update(zip(missing, hash_files(missing)))
+            rows = [
+                (algorithm, keys[path], stats[path].st_mtime_ns, stats[path].st_size, digests[path])
+                for path in missing
+            ]
+            if conn is not None:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO checksums VALUES (?, ?, ?, ?, ?)", rows)
+                    _prune_checksum_cache(conn)
+    except sqlite3.Error:
+        pass
+    finally:
+        if conn is not None:
+            conn.close()
+    return digests
+
+
+def calculate_local_checksum(file_path: Path, algorithm: str = "sha256", use_cache: bool = False) -> str:
     """Calculate the checksum of a file using the given hashing algorithm.
 
     Args:
     ----
         file_path (Path): Path to the file.
         algorithm (str): Hashing algorithm (e.g., 'md5', 'sha1', 'sha256').
+        use_cache (bool): Reuse the checksum stored in CHECKSUM_CACHE_FP if the
+            file did not change since it was last hashed.
 
     Returns:
     -------
         str: Hex digest of the checksum.
 
     """
-    try:
-        hasher = hashlib.new(algorithm)
-    except ValueError as e:
-        raise ValueError(f"Unsupported hash algorithm: {algorithm}") from e
+    _check_algorithm(algorithm)
+    if not use_cache:
+        return _hash_file(file_path, algorithm)
+    hash_files = partial(map, partial(_hash_file, algorithm=algorithm))
+    return _cached_checksums([file_path], algorithm, hash_files)[file_path]
 
-    # Read file in chunks to handle large files efficiently
-    with file_path.open("rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            hasher.update(chunk)
 
-    return hasher.hexdigest()
+def calculate_local_checksums(
+    file_paths: list[Path], algorithm: str = "sha256", use_cache: bool = False, max_workers: int | None = None
+) -> dict[Path, str]:
+    """Calculate the checksums of several files in parallel.
+
+    hashlib releases the GIL while hashing, so the files are hashed by a thread pool.
+
+    Args:
+    ----
+        file_paths (list[Path]): Paths to the files.
+        algorithm (str): Hashing algorithm (e.g., 'md5', 'sha1', 'sha256').
+        use_cache (bool): Only hash files that are new or changed since they were
+            last hashed.
+        max_workers (int | None): Number of hashing threads; the executor's default
+            suits SSDs, a small number (2-4) avoids seek thrashing on spinning disks.
+
+    Returns:
+    -------
+        dict[Path, str]: Hex digest per file path.
+
+    """
+    _check_algorithm(algorithm)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        hash_files = partial(pool.map, partial(_hash_file, algorithm=algorithm))
+        if use_cache:
+            return _cached_checksums(file_paths, algorithm, hash_files)
+        return dict(zip(file_paths, hash_files(file_paths)))
 
 
 def calculate_remote_checksum(host: str, username: str, file_path: Path, algorithm: str = "sha256") -> str:
@@ -76,26 +286,71 @@ def calculate_remote_checksum(host: str, username: str, file_path: Path, algorit
         RuntimeError: If SSH or checksum command fails.
 
     """
-    # Map algorithm to remote commands
-    cmd_map = {"sha256": "sha256sum", "md5": "md5sum", "sha1": "sha1sum", "sha512": "sha512sum"}
+    return calculate_remote_checksums(host, username, [file_path], algorithm)[str(file_path)]
+
+
+def calculate_remote_checksums(
+    host: str, username: str, file_paths: list[Path], algorithm: str = "sha256"
+) -> dict[str, str]:
+    """Calculate checksums for several files on one remote host with a single SSH call.
+
+    Args:
+    ----
+        host (str): The remote hostname or IP address.
+        username (str): SSH username.
+        file_paths (list[Path]): Remote file paths.
+        algorithm (str): Hash algorithm ('sha256', 'md5', 'sha1', etc.).
+
+    Returns:
+    -------
+        dict[str, str]: Checksum (hex digest) per remote file path.
+
+    Raises:
+    ------
+        RuntimeError: If SSH or checksum command fails.
+
+    """
+    # Map algorithm to the coreutils command and the openssl digest name
+    cmd_map = {
+        "sha256": ("sha256sum", "sha256"),
+        "md5": ("md5sum", "md5"),
+        "sha1": ("sha1sum", "sha1"),
+        "sha512": ("sha512sum", "sha512"),
+        "blake2b": ("b2sum", "blake2b512"),
+    }
 
     if algorithm not in cmd_map:
         raise ValueError(f"Unsupported algorithm: {algorithm}")
-
-    # Build the SSH command
-    remote_file = str(file_path)
-    remote_cmd = f"{cmd_map[algorithm]} {remote_file}"
-    ssh_cmd = ["ssh", f"{username}@{host}", remote_cmd]
+    sum_cmd, openssl_digest = cmd_map[algorithm]
+
+    remote_files = [str(file_path) for file_path in file_paths]
+    if not remote_files:
+        return {}
+
+    # The paths go NUL-separated over stdin to xargs, so neither quoting nor the remote
+    # ARG_MAX limits how many files one call can handle; xargs keeps them in order.
+    # openssl uses the CPU's SHA extensions, which coreutils often is not built with;
+    # both print '<digest> <path>' per file
+    remote_cmd = (
+        f"if command -v openssl >/dev/null 2>&1; then xargs -0 openssl dgst -{openssl_digest} -r; "
+        f"else xargs -0 {sum_cmd} --; fi"
+    )
+    ssh_cmd = ["ssh", *_ssh_multiplex_options(), f"{username}@{host}", remote_cmd]
+    # openssl has no '--', so relative paths that look like options are anchored to the working directory
+    stdin = "\0".join(f"./{f}" if f.startswith("-") else f for f in remote_files)
 
     # Run SSH command
-    result = subprocess.run(ssh_cmd, capture_output=True, text=True, check=True)
+    result = subprocess.run(ssh_cmd, input=stdin, capture_output=True, text=True, check=True)
 
     if result.returncode != 0:
         raise RuntimeError(f"SSH or checksum failed: {result.stderr.strip()}")
 
-    # Parse checksum (first token in output)
-    checksum = result.stdout.strip().split()[0]
-    return checksum
+    # One output line per file, in the order the files were given; checksum is the first token
+    lines = result.stdout.strip().splitlines()
+    if len(lines) != len(remote_files):
+        raise RuntimeError(f"Expected {len(remote_files)} checksums, got: {result.stdout.strip()}")
+    return {remote_file: line.split()[0] for remote_file, line in zip(remote_files, lines)}
+
 
 def build_transfer_commands(dataset, username=None, dest="."):
     """Build download commands (scp, rsync, webdav) based on dataset metadata.
@@ -112,16 +367,19 @@ def build_transfer_commands(dataset, username=None, dest="."):
     # Read protocol information (protocols list or single protocol)
     protocols_raw = extras.get("protocols") or extras.get("protocol") or "[]"
 
-    # Parse protocols
+    # Parse protocols; only JSON lists and strings need decoding, anything else is a bare name
     protocols = []
-    if isinstance(protocols_raw, str):
+    if isinstance(protocols_raw, str) and protocols_raw[:1] in ("[", '"'):
         try:
             parsed = json.loads(protocols_raw)
             protocols = parsed if isinstance(parsed, list) else [parsed]
         except json.JSONDecodeError:
             protocols = [protocols_raw]
+    elif isinstance(protocols_raw, str):
+        protocols = [protocols_raw]
     elif isinstance(protocols_raw, list):
         protocols = protocols_raw
+    protocols = frozenset(p for p in protocols if isinstance(p, str))
 
     # --------------------------------------
     # Detect LOCAL dataset
@@ -134,16 +392,16 @@ def build_transfer_commands(dataset, username=None, dest="."):
 
     commands = {}
 
-    # Normalize remote filesystem paths
+    # Normalize remote filesystem paths; remote hosts are POSIX whatever this client runs on
     if location and not location.startswith("http"):
-        norm_path = os.path.normpath(location)
+        norm_path = posixpath.normpath(location)
     else:
         norm_path = location
 
     # --------------------------------------
     # SSH / SCP
     # --------------------------------------
-    if "ssh" in protocols or "scp" in protocols:
+    if not protocols.isdisjoint(("ssh", "scp")):
         commands["scp"] = f"scp {username_display}@{server}:{norm_path} {dest}"
 
     # --------------------------------------
@@ -0,0 +1,101 @@
+from unittest.mock import patch
+
+import pytest
+from httpx import HTTPError
+
+ckanapi = pytest.importorskip("ckanapi")
+
+import surfmeta.ckan  # noqa: E402
+from surfmeta.ckan import Ckan  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def listing_cache(tmp_path, monkeypatch):
+    """Keep the listing cache out of the home directory."""
+    cache_fp = tmp_path / "cache" / "listings.json"
+    monkeypatch.setattr(surfmeta.ckan, "LISTING_CACHE_FP", cache_fp)
+    return cache_fp
+
+
+def connect(token="token"):
+    """Ckan instance talking to a mocked RemoteCKAN."""
+    with patch("surfmeta.ckan.RemoteCKAN") as remote:
+        conn = Ckan("https://ckan.example.org", token)
+    assert remote.call_args.kwargs["apikey"] == token
+    return conn
+
+
+@pytest.fixture
+def ckan():
+    """Ckan instance talking to a mocked RemoteCKAN."""
+    return connect()
+
+
+def test_patch_extras(ckan):
+    """Only the id and the complete extras list are sent to package_patch."""
+    extras = [{"key": "location", "value": "/data/b.txt"}]
+    ckan.api.action.package_patch.return_value = {"name": "ds", "extras": extras}
+
+    assert ckan.patch_extras("ds", extras) == {"name": "ds", "extras": extras}
+    ckan.api.action.package_patch.assert_called_once_with(id="ds", extras=extras)
+
+
+@pytest.mark.parametrize("error", [ckanapi.ValidationError({"extras": "bad"}), ckanapi.NotFound("ds")])
+def test_patch_extras_reraises_ckan_errors(ckan, error):
+    """Validation and not-found errors reach the caller unchanged."""
+    ckan.api.action.package_patch.side_effect = error
+
+    with pytest.raises(type(error)):
+        ckan.patch_extras("ds", [])
+
+
+def test_patch_extras_wraps_other_errors(ckan):
+    """Other failures are reported as HTTPError with the original as cause."""
+    cause = ConnectionError("connection reset")
+    ckan.api.action.package_patch.side_effect = cause
+
+    with pytest.raises(HTTPError) as exc_info:
+        ckan.patch_extras("ds", [])
+
+    assert exc_info.value.__cause__ is cause
+
+
+def test_listing_cached_on_disk(ckan):
+    """A second instance reuses the listing of the first within the TTL."""
+    ckan.api.action.organization_list.return_value = ["org-a"]
+    assert ckan.list_organisations() == ["org-a"]
+
+    other = connect()
+    assert other.list_organisations() == ["org-a"]
+    other.api.action.organization_list.assert_not_called()
+
+
+def test_listing_cache_per_token(ckan):
+    """Another token does not see the cached listing of the first."""
+    ckan.api.action.organization_list.return_value = ["org-a"]
+    ckan.list_organisations()
+
+    other = connect("other-token")
+    other.api.action.organization_list.return_value = ["org-b"]
+    assert other.list_organisations() == ["org-b"]
+
+
+def test_listing_cache_expires(ckan, monkeypatch):
+    """After LISTING_CACHE_TTL seconds the listing is fetched again."""
+    ckan.api.action.group_list.return_value = ["group-a"]
+    ckan.list_groups()
+
+    now = surfmeta.ckan.time.time()
+    monkeypatch.setattr(surfmeta.ckan.time, "time", lambda: now + surfmeta.ckan.LISTING_CACHE_TTL + 1)
+    other = connect()
+    other.api.action.group_list.return_value = ["group-b"]
+    assert other.list_groups() == ["group-b"]
+
+
+def test_listing_refresh(ckan):
+    """refresh=True bypasses both the memory and the disk cache."""
+    ckan.api.action.group_list.side_effect = [["group-a"], ["group-a", "group-b"]]
+    assert ckan.list_groups() == ["group-a"]
+
+    assert ckan.list_groups(refresh=True) == ["group-a", "group-b"]
+    assert connect().list_groups() == ["group-a", "group-b"]
@@ -0,0 +1,274 @@
+import copy
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from httpx import HTTPError
+
+from surfmeta.dcache import DCache
+
+WEBDAV = "https://webdav.example.org:2880"
+
+
+def make_dataset(name, path):
+    """CKAN dataset whose location points to a dCache path."""
+    return {
+        "id": f"id-{name}",
+        "name": name,
+        "extras": [
+            {"key": "system_name", "value": "dcache"},
+            {"key": "location", "value": f"{WEBDAV}{path}"},
+        ],
+    }
+
+
+@pytest.fixture
+def dcache():
+    """DCache instance without tool checks, authentication or a real CKAN connection."""
+    dc = DCache.__new__(DCache)
+    dc.auth_type = "macaroon"
+    dc.auth_file = Path("/tmp/macaroon.dat")
+    dc.ckan = MagicMock()
+    dc._datasets = []
+    dc._datasets_fetched = float("-inf")
+    # package_show hands out a fresh copy of the datasets CKAN listed
+    dc.ckan.get_dataset_info.side_effect = lambda name: copy.deepcopy(
+        next(ds for ds in dc.ckan.list_all_datasets.return_value if ds["name"] == name)
+    )
+    return dc
+
+
+def mock_events(*lines, returncode=0):
+    """Mock subprocess.Popen for `ada --events` printing the given lines."""
+    proc = MagicMock()
+    proc.stdout = iter(line + "\n" for line in lines)
+    proc.wait.return_value = returncode
+    popen = MagicMock()
+    popen.return_value.__enter__.return_value = proc
+    return popen
+
+
+def test_listener_finds_dataset_created_after_snapshot(dcache):
+    """An event for a path missing from the dataset snapshot fetches the datasets again."""
+    pytest.importorskip("ckanapi")
+    dcache._datasets = [make_dataset("old", "/data/old.txt")]
+    dcache._datasets_fetched = time.monotonic() - 10
+    new = make_dataset("new", "/data/new.txt")
+    dcache.ckan.list_all_datasets.return_value = [make_dataset("old", "/data/old.txt"), new]
+    dcache.ckan.patch_extras.side_effect = lambda dataset_id, extras: {**new, "extras": extras}
+
+    with patch("surfmeta.dcache.subprocess.Popen", mock_events("IN_DELETE /data/new.txt")):
+        dcache.listen(Path("/data"))
+
+    dcache.ckan.list_all_datasets.assert_called_once_with(include_private=True)
+    dataset_id, extras = dcache.ckan.patch_extras.call_args.args
+    assert dataset_id == "new"
+    assert extras[-1]["key"].startswith("!!!DELETED_WARNING_")
+
+
+def test_find_datasets_limits_refetch_on_miss(dcache):
+    """Unknown paths right after a fetch do not ask CKAN again."""
+    pytest.importorskip("ckanapi")
+    dcache.ckan.list_all_datasets.return_value = [make_dataset("old", "/data/old.txt")]
+
+    assert dcache._find_datasets("/data/unknown1.txt") == []
+    assert dcache._find_datasets("/data/unknown2.txt") == []
+    assert dcache._find_datasets("/data/old.txt")[0]["dataset"]["name"] == "old"
+    dcache.ckan.list_all_datasets.assert_called_once()
+
+
+def ckan_error(cause):
+    """HTTPError as raised by Ckan.patch_extras for an underlying failure."""
+    err = HTTPError(f"Error updating extras of dataset 'ds': {cause}")
+    err.__cause__ = cause
+    return err
+
+
+def test_patch_extras_retries_transient_errors(dcache):
+    """Connection errors and 5xx responses are retried until CKAN answers."""
+    dataset = make_dataset("ds", "/data/a.txt")
+    dcache.ckan.patch_extras.side_effect = [
+        ckan_error(ConnectionError("connection reset")),
+        ckan_error(Exception(repr([f"{WEBDAV}/api/action/package_patch", 503, "Service Unavailable"]))),
+        dataset,
+    ]
+
+    with patch("surfmeta.dcache.time.sleep") as sleep:
+        assert dcache._patch_extras("ds", dataset["extras"]) == dataset
+
+    assert dcache.ckan.patch_extras.call_count == 3
+    assert sleep.call_count == 2
+
+
+def test_patch_extras_does_not_retry_permanent_errors(dcache):
+    """Authorisation and other 4xx failures are raised without waiting."""
+    dcache.ckan.patch_extras.side_effect = ckan_error(Exception("Authorization Error: not allowed"))
+
+    with patch("surfmeta.dcache.time.sleep") as sleep, pytest.raises(HTTPError):
+        dcache._patch_extras("ds", [])
+
+    dcache.ckan.patch_extras.assert_called_once()
+    sleep.assert_not_called()
+
+
+def test_get_checksum(dcache):
+    """The algorithm and value are taken from the ada output."""
+    with patch.object(DCache, "_run_dcache_cmd", return_value="/data/a.txt ADLER32=0a1b2c3d\n"):
+        assert dcache.get_checksum(Path("/data/a.txt")) == ("ADLER32", "0a1b2c3d")
+
+    with patch.object(DCache, "_run_dcache_cmd", return_value="/data/a.txt"), pytest.raises(KeyError):
+        dcache.get_checksum(Path("/data/a.txt"))
+
+
+@pytest.mark.parametrize(
+    "stat, expected",
+    [
+        ('{"labels": ["test-ckan"]}', True),
+        ('{"labels": []}', False),
+        ('{"path": "/data/test-ckan.txt", "labels": ["other"]}', False),
+        ('{"path": "/data/a.txt"}', False),
+    ],
+)
+def test_has_label(dcache, stat, expected):
+    """Only a label in the labels list counts, not the label text elsewhere in the output."""
+    with patch.object(DCache, "_run_dcache_cmd", return_value=stat):
+        assert dcache._has_label("/data/a.txt", "test-ckan") is expected
+
+
+@pytest.mark.parametrize(
+    "last_line, returncode, message",
+    [
+        ("ERROR: /data/a.txt is not a directory", 1, "is not a directory"),
+        ("ERROR: channel name 'chan' is already used", 1, "channel name chan is already used"),
+        ("ERROR: something else", 0, "ERROR: something else"),
+        ("", 2, "ada exited with code 2"),
+    ],
+)
+def test_listen_reports_ada_failures(dcache, capsys, last_line, returncode, message):
+    """Listener failures are classified from the exit code and the last output line."""
+    with patch("surfmeta.dcache.subprocess.Popen", mock_events(last_line, returncode=returncode)):
+        dcache.listen(Path("/data"))
+
+    out = capsys.readouterr().out
+    assert "❌ Error:" in out
+    assert message in out
+
+
+def test_listen_ends_quietly(dcache, capsys):
+    """A listener that exits cleanly reports no error."""
+    with patch("surfmeta.dcache.subprocess.Popen", mock_events("some event")):
+        dcache.listen(Path("/data"))
+
+    assert "❌" not in capsys.readouterr().out
+
+
+def test_listen_updates_location_of_labelled_move(dcache):
+    """A move of a labelled file replaces only the path suffix of the location, in place."""
+    pytest.importorskip("ckanapi")
+    dataset = make_dataset("ds", "/data/a.txt")
+    dataset["extras"].append({"key": "owner", "value": "me"})
+    dcache.ckan.list_all_datasets.return_value = [dataset]
+    dcache.ckan.patch_extras.side_effect = lambda dataset_id, extras: {**dataset, "extras": extras}
+
+    events = mock_events("IN_MOVED_FROM /data/a.txt", "IN_MOVED_TO /data/b.txt")
+    with (
+        patch("surfmeta.dcache.subprocess.Popen", events),
+        patch.object(DCache, "_has_label", return_value=True) as has_label,
+    ):
+        dcache.listen(Path("/data"))
+
+    has_label.assert_called_once_with("/data/b.txt", "test-ckan")
+    dataset_id, extras = dcache.ckan.patch_extras.call_args.args
+    assert dataset_id == "ds"
+    assert extras == [
+        {"key": "system_name", "value": "dcache"},
+        {"key": "location", "value": f"{WEBDAV}/data/b.txt"},
+        {"key": "owner", "value": "me"},
+    ]
+    # The original dataset is left alone, the local copy holds CKAN's answer
+    assert dataset["extras"][1]["value"] == f"{WEBDAV}/data/a.txt"
+    assert dcache._datasets[0]["extras"] == extras
+
+
+def test_update_location_needs_path_suffix(dcache, capsys):
+    """Only a location that ends with the moved path is updated."""
+    pytest.importorskip("ckanapi")
+    dcache.ckan.list_all_datasets.return_value = [make_dataset("ds", "/data/a.txt")]
+
+    dcache._update_ckan_location("/data/a.txt", "/data/b.txt")
+    dcache.ckan.patch_extras.assert_called_once()
+
+    dcache.ckan.patch_extras.reset_mock()
+    dcache.ckan.list_all_datasets.return_value = [make_dataset("ds", "/data/a.txt.bak")]
+    dcache._datasets_fetched = float("-inf")
+    dcache._update_ckan_location("/data/a.txt", "/data/b.txt")
+    dcache.ckan.patch_extras.assert_not_called()
+    assert "No CKAN dataset found for path: /data/a.txt" in capsys.readouterr().out
+
+
+def test_delete_adds_warning(dcache):
+    """A delete appends a warning extra to every matching dataset and stores the result."""
+    pytest.importorskip("ckanapi")
+    dataset = make_dataset("ds", "/data/a.txt")
+    dcache.ckan.list_all_datasets.return_value = [dataset]
+    dcache.ckan.patch_extras.side_effect = lambda dataset_id, extras: {**dataset, "extras": extras}
+
+    dcache._dcache_warning_ckan("/data/a.txt")
+
+    dataset_id, extras = dcache.ckan.patch_extras.call_args.args
+    assert dataset_id == "ds"
+    assert extras[:2] == dataset["extras"]
+    assert extras[2]["key"].startswith("!!!DELETED_WARNING_")
+    assert "/data/a.txt" in extras[2]["value"]
+    assert dcache._datasets[0]["extras"] == extras
+
+
+def test_update_location_uses_current_extras(dcache):
+    """Extras changed in CKAN after the copy was fetched are kept, not overwritten."""
+    pytest.importorskip("ckanapi")
+    dcache.ckan.list_all_datasets.return_value = [make_dataset("ds", "/data/a.txt")]
+    dcache._fetch_datasets()
+    # Another client adds a key and deletes the system name after the listing
+    current = make_dataset("ds", "/data/a.txt")
+    current["extras"] = [current["extras"][1], {"key": "owner", "value": "me"}]
+    dcache.ckan.get_dataset_info.side_effect = None
+    dcache.ckan.get_dataset_info.return_value = current
+
+    dcache._update_ckan_location("/data/a.txt", "/data/b.txt")
+    dcache._dcache_warning_ckan("/data/a.txt")
+
+    dcache.ckan.get_dataset_info.assert_called_with("ds")
+    location_call, warning_call = dcache.ckan.patch_extras.call_args_list
+    assert location_call.args[1] == [
+        {"key": "location", "value": f"{WEBDAV}/data/b.txt"},
+        {"key": "owner", "value": "me"},
+    ]
+    assert warning_call.args[1][:2] == current["extras"]
+
+
+def test_update_location_skips_moved_in_ckan(dcache, capsys):
+    """A dataset whose location changed in CKAN since the copy was fetched is left alone."""
+    pytest.importorskip("ckanapi")
+    dcache.ckan.list_all_datasets.return_value = [make_dataset("ds", "/data/a.txt")]
+    dcache._fetch_datasets()
+    dcache.ckan.get_dataset_info.side_effect = None
+    dcache.ckan.get_dataset_info.return_value = make_dataset("ds", "/data/c.txt")
+
+    dcache._update_ckan_location("/data/a.txt", "/data/b.txt")
+
+    dcache.ckan.patch_extras.assert_not_called()
+    assert "Location of dataset 'ds' no longer ends with /data/a.txt, skipping." in capsys.readouterr().out
+    assert dcache._datasets == [make_dataset("ds", "/data/c.txt")]
+
+
+def test_store_dataset_replaces_by_id(dcache):
+    """Only the dataset with the same id is replaced in the local copy."""
+    first, second = make_dataset("one", "/data/1.txt"), make_dataset("two", "/data/2.txt")
+    dcache._datasets = [first, second]
+    updated = {**second, "title": "updated"}
+
+    dcache._store_dataset(updated)
+    dcache._store_dataset({"id": "unknown"})
+
+    assert dcache._datasets == [first, updated]
@@ -17,8 +17,8 @@ class Args:
 def ckan_conn_mock():
     """Mock CKAN connection object."""
     mock = MagicMock()
-    # Mock list_all_datasets
-    mock.list_all_datasets.return_value = [
+    # Mock iter_datasets
+    mock.iter_datasets.return_value = [
         {
             "title": "Dataset 1",
             "name": "uuid-1",
@@ -58,8 +58,17 @@ def capture_output(func, *args, **kwargs):
 def test_list_all_datasets(ckan_conn_mock):
     args = Args()
     output = capture_output(handle_md_list, ckan_conn_mock, args)
+    assert "Found 2 datasets" in output
     assert "Dataset 1 (uuid-1)" in output
 
+def test_list_all_datasets_limit(ckan_conn_mock):
+    args = Args()
+    args.limit = 1
+    output = capture_output(handle_md_list, ckan_conn_mock, args)
+    assert "Showing 1 datasets" in output
+    assert "Found" not in output
+    assert "Dataset 2" not in output
+
 def test_show_dataset_metadata_full(ckan_conn_mock):
     args = Args(uuid="uuid-1")
     output = capture_output(handle_md_list, ckan_conn_mock, args)
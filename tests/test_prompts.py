@@ -0,0 +1,128 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from surfmeta.cli_handlers import _choose, _find_candidates, user_input_meta
+
+ORGS = ["book-club", "climate-lab", "book-binders"]
+
+
+def feed_input(monkeypatch, *answers):
+    """Answer successive input() prompts with the given strings."""
+    answers = iter(answers)
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+
+
+def test_choose_by_number(monkeypatch):
+    """A number picks the item at that position."""
+    feed_input(monkeypatch, "2")
+    assert _choose(ORGS, "Select: ") == "climate-lab"
+
+
+def test_choose_filter_then_number(monkeypatch, capsys):
+    """Text lists the matching items with their position in the full list."""
+    feed_input(monkeypatch, "binders", "3")
+
+    assert _choose(ORGS, "Select: ") == "book-binders"
+    assert capsys.readouterr().out == "  3) book-binders\n"
+
+
+def test_choose_filter_without_match(monkeypatch, capsys):
+    """Text that matches nothing says so instead of asking for a number."""
+    feed_input(monkeypatch, "physics", "1")
+
+    assert _choose(ORGS, "Select: ") == "book-club"
+    out = capsys.readouterr().out
+    assert "Nothing matches 'physics'" in out
+    assert "valid number" not in out
+
+
+def test_choose_empty_answer(monkeypatch, capsys):
+    """An empty answer asks for a number again."""
+    feed_input(monkeypatch, "", "1")
+
+    assert _choose(ORGS, "Select: ") == "book-club"
+    assert "Please enter a valid number" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("answer", ["0", "4", "10"])
+def test_choose_number_out_of_range(monkeypatch, capsys, answer):
+    """Numbers outside the listing are rejected with the valid range."""
+    feed_input(monkeypatch, answer, "1")
+
+    assert _choose(ORGS, "Select: ") == "book-club"
+    assert "Invalid choice. Please choose 1–3." in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("answer", ["-1", "2 book", "1.5", "book2"])
+def test_choose_mixed_input_is_filter_text(monkeypatch, capsys, answer):
+    """Anything that is not only digits filters the listing and never selects an item."""
+    feed_input(monkeypatch, answer, "2")
+
+    assert _choose(ORGS, "Select: ") == "climate-lab"
+    assert f"Nothing matches '{answer}'" in capsys.readouterr().out
+
+
+def test_find_candidates_search(monkeypatch):
+    """A search term asks CKAN for matches only."""
+    search, listing = MagicMock(return_value=["book-club"]), MagicMock()
+    feed_input(monkeypatch, "book")
+
+    assert _find_candidates(search, listing, "organisations") == ["book-club"]
+    search.assert_called_once_with("book", limit=21)
+    listing.assert_not_called()
+
+
+def test_find_candidates_search_truncated(monkeypatch, capsys):
+    """More matches than are shown come with a hint to refine the search."""
+    names = [f"org-{i}" for i in range(21)]
+    search = MagicMock(side_effect=lambda query, limit: names[:limit])
+    feed_input(monkeypatch, "org")
+
+    assert _find_candidates(search, MagicMock(), "organisations") == names[:20]
+    assert "Showing the first 20 organisations only, refine the search" in capsys.readouterr().out
+
+
+def test_find_candidates_search_at_limit(monkeypatch, capsys):
+    """Exactly as many matches as are shown need no hint."""
+    search = MagicMock(return_value=[f"org-{i}" for i in range(20)])
+    feed_input(monkeypatch, "org")
+
+    assert len(_find_candidates(search, MagicMock(), "organisations")) == 20
+    assert "refine" not in capsys.readouterr().out
+
+
+def test_find_candidates_retry_and_list_all(monkeypatch, capsys):
+    """A search without results asks again; an empty answer lists everything."""
+    search, listing = MagicMock(return_value=[]), MagicMock(return_value=ORGS)
+    feed_input(monkeypatch, "physics", "")
+
+    assert _find_candidates(search, listing, "organisations", refresh=True) == ORGS
+    assert "No organisations match 'physics'" in capsys.readouterr().out
+    listing.assert_called_once_with(refresh=True)
+
+
+def test_user_input_meta(monkeypatch):
+    """The create dialogue searches, filters and picks an organisation and a group."""
+    conn = MagicMock()
+    conn.search_organisations.return_value = ORGS
+    conn.list_groups.return_value = ["analysis-data", "raw-data"]
+    feed_input(monkeypatch, "Sherlock Holmes", "A Conan Doyle", "book", "binders", "3", "y", "", "1")
+
+    meta = user_input_meta(conn)
+
+    assert meta["title"] == "Sherlock Holmes"
+    assert meta["author"] == "A Conan Doyle"
+    assert meta["owner_org"] == "book-binders"
+    assert meta["groups"] == [{"name": "analysis-data"}]
+    conn.list_groups.assert_called_once_with(refresh=False)
+
+
+def test_user_input_meta_without_organisations(monkeypatch):
+    """Without any organisation no dataset can be created."""
+    conn = MagicMock()
+    conn.list_organisations.return_value = []
+    feed_input(monkeypatch, "Sherlock Holmes", "A Conan Doyle", "")
+
+    with pytest.raises(RuntimeError):
+        user_input_meta(conn)
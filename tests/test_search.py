@@ -2,7 +2,7 @@ import pytest
 import json
 from io import StringIO
 from surfmeta.cli_handlers import handle_md_search
-from surfmeta.search_utils import print_dataset_results, _dataset_matches, search_datasets
+from surfmeta.search_utils import print_dataset_results, _dataset_matches, search_datasets, build_filter_query
 from surfmeta.metadata_utils import normalize_extras_for_search, _flatten_value_for_search
 
 
@@ -113,6 +113,14 @@ def test_search_datasets_group():
     assert len(result) == 1
     assert result[0]["name"] == "dataset3"
 
+def test_build_filter_query():
+    assert build_filter_query() == ""
+    assert build_filter_query(org="Org1") == 'organization:"org1"'
+    assert build_filter_query(org="org1", group="group2") == 'organization:"org1" AND groups:"group2"'
+    # Quotes and backslashes cannot end the phrase early
+    assert build_filter_query(org='a"b') == r'organization:"a\"b"'
+    assert build_filter_query(group="a\\") == r'groups:"a\\"'
+
 # -----------------------------
 # Tests for _print_dataset_results
 # -----------------------------
@@ -88,6 +88,12 @@ def test_dataset_matches_keyword_only():
     assert _dataset_matches(ds, keywords=["randomforest"]) is True
     assert _dataset_matches(ds, keywords=["nonexistent"]) is False
 
+def test_dataset_matches_keyword_in_title():
+    ds = MOCK_DATASETS[1]
+    assert _dataset_matches(ds, keywords=["another"]) is True
+    assert _dataset_matches(ds, keywords=["nonexistent", "AGENTX"]) is True
+    assert _dataset_matches(ds, keywords=["a.ent"]) is False
+
 def test_dataset_matches_org_only():
     ds = MOCK_DATASETS[1]
     assert _dataset_matches(ds, org_filter="org2") is True
@@ -146,6 +152,11 @@ def test_search_datasets_group():
     assert len(result) == 1
     assert result[0]["name"] == "dataset3"
 
+def test_search_datasets_limit():
+    result = search_datasets(iter(MOCK_DATASETS), keyword=["randomforest"], limit=1)
+    assert len(result) == 1
+    assert result[0]["name"] == "dataset1"
+
 def test_search_datasets_system():
     result = search_datasets(MOCK_DATASETS, system="systemA")
     assert len(result) == 2  # dataset1 and dataset3 should match systemA
@@ -169,6 +180,9 @@ class MockCKANConn:
     def list_all_datasets(self, include_private=True):
         return MOCK_DATASETS
 
+    def iter_datasets(self, include_private=True, fq=""):
+        return iter(MOCK_DATASETS)
+
 @pytest.mark.parametrize("args, expected_count", [
     ({"keyword": ["randomforest"], "org": None, "group": None, "system_name": None}, 2),
     ({"keyword": None, "org": "org1", "group": None, "system_name": None}, 2),
@@ -1,12 +1,30 @@
 import platform
+import sqlite3
 import warnings
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
-from surfmeta.utils import get_system_info, calculate_local_checksum, calculate_remote_checksum
+import surfmeta.utils
+from surfmeta.utils import (
+    build_transfer_commands,
+    get_system_info,
+    calculate_local_checksum,
+    calculate_local_checksums,
+    calculate_remote_checksum,
+    calculate_remote_checksums,
+)
 from surfmeta.system_metadata import local_meta, snellius_meta, meta_checksum
 
+
+@pytest.fixture(autouse=True)
+def checksum_cache(tmp_path, monkeypatch):
+    """Keep the checksum cache out of the home directory."""
+    cache_fp = tmp_path / "cache" / "checksums.sqlite"
+    monkeypatch.setattr(surfmeta.utils, "CHECKSUM_CACHE_FP", cache_fp)
+    return cache_fp
+
+
 def test_get_system_info(monkeypatch):
     """Ensure get_system_info returns the platform node name."""
     monkeypatch.setattr(platform, "node", lambda: "test-node")
@@ -38,6 +56,80 @@ def test_calculate_local_checksum_invalid_algorithm(tmp_path: Path):
         calculate_local_checksum(test_file, "unsupportedalgo")
 
 
+def test_calculate_local_checksums(tmp_path: Path):
+    """Each file should get the same checksum as a single calculation."""
+    files = [tmp_path / "a.txt", tmp_path / "b.txt"]
+    for i, f in enumerate(files):
+        f.write_text(f"content {i}")
+
+    checksums = calculate_local_checksums(files, "md5")
+
+    assert checksums == {f: calculate_local_checksum(f, "md5") for f in files}
+
+
+def test_calculate_local_checksum_cache(tmp_path: Path, checksum_cache: Path):
+    """With the cache, unchanged files are not hashed again; changed files are."""
+    test_file = tmp_path / "test.txt"
+    test_file.write_text("hello world")
+    calculate_local_checksum(test_file, "md5")
+    assert not checksum_cache.exists()  # the cache is opt-in
+    assert calculate_local_checksum(test_file, "md5", use_cache=True) == "5eb63bbbe01eeed093cb22bb8f5acdc3"
+    assert checksum_cache.is_file()
+
+    with patch("surfmeta.utils._hash_file") as mock_hash:
+        assert calculate_local_checksum(test_file, "md5", use_cache=True) == "5eb63bbbe01eeed093cb22bb8f5acdc3"
+        mock_hash.assert_not_called()
+
+    test_file.write_text("hello world!")
+    assert calculate_local_checksum(test_file, "md5", use_cache=True) == "fc3ff98e8c6a0d3087d515c0473f8677"
+
+
+def cached_paths(checksum_cache: Path) -> list[str]:
+    """Paths in the checksum cache, from least to most recently stored."""
+    with sqlite3.connect(checksum_cache) as conn:
+        return [path for (path,) in conn.execute("SELECT path FROM checksums ORDER BY rowid")]
+
+
+def test_checksum_cache_keeps_other_entries(tmp_path: Path, checksum_cache: Path):
+    """Storing a checksum adds its own entry and keeps those stored by earlier runs."""
+    files = [tmp_path / f"{i}.txt" for i in range(3)]
+    for f in files:
+        f.write_text(f.name)
+
+    for f in files:
+        calculate_local_checksum(f, "md5", use_cache=True)
+
+    assert cached_paths(checksum_cache) == [str(f.resolve()) for f in files]
+    with patch("surfmeta.utils._hash_file") as mock_hash:
+        calculate_local_checksums(files, "md5", use_cache=True)
+        mock_hash.assert_not_called()
+
+
+def test_checksum_cache_unusable(tmp_path: Path, checksum_cache: Path):
+    """A cache file that is not a database does not stop the checksum calculation."""
+    checksum_cache.parent.mkdir()
+    checksum_cache.write_text("not a database")
+    test_file = tmp_path / "test.txt"
+    test_file.write_text("hello world")
+
+    assert calculate_local_checksum(test_file, "md5", use_cache=True) == "5eb63bbbe01eeed093cb22bb8f5acdc3"
+
+
+def test_checksum_cache_pruned(tmp_path: Path, checksum_cache: Path, monkeypatch):
+    """The cache drops deleted files first, then the least recently stored entries."""
+    monkeypatch.setattr(surfmeta.utils, "CHECKSUM_CACHE_MAX_ENTRIES", 4)
+    files = [tmp_path / f"{i}.txt" for i in range(5)]
+    for f in files:
+        f.write_text(f.name)
+    calculate_local_checksums(files[:4], "md5", use_cache=True)
+    files[0].unlink()
+
+    calculate_local_checksums(files[4:], "md5", use_cache=True)
+
+    # Limit 4, trimmed to 3: the deleted file goes first, then the oldest remaining one
+    assert cached_paths(checksum_cache) == [str(f.resolve()) for f in files[2:]]
+
+
 @patch("subprocess.run")
 def test_calculate_remote_checksum(mock_run):
     """Test remote checksum parsing from subprocess output."""
@@ -55,6 +147,41 @@ def test_calculate_remote_checksum(mock_run):
     assert "user@host" in cmd
 
 
+@patch("subprocess.run")
+def test_calculate_remote_checksums(mock_run):
+    """Several files should be checksummed in one SSH call, with the paths on stdin."""
+    mock_result = MagicMock()
+    mock_result.returncode = 0
+    mock_result.stdout = "aaaa  /data/a.txt\nbbbb  /data/b c.txt\n"
+    mock_run.return_value = mock_result
+
+    checksums = calculate_remote_checksums("host", "user", [Path("/data/a.txt"), Path("/data/b c.txt")], "md5")
+
+    assert checksums == {"/data/a.txt": "aaaa", "/data/b c.txt": "bbbb"}
+    mock_run.assert_called_once()
+    assert mock_run.call_args[0][0][-1] == (
+        "if command -v openssl >/dev/null 2>&1; then xargs -0 openssl dgst -md5 -r; else xargs -0 md5sum --; fi"
+    )
+    assert mock_run.call_args.kwargs["input"] == "/data/a.txt\0/data/b c.txt"
+
+
+@pytest.mark.parametrize(
+    "platform_name, has_ssh_dir, multiplexed",
+    [("linux", True, True), ("linux", False, False), ("win32", True, False)],
+)
+def test_ssh_multiplex_options(tmp_path: Path, monkeypatch, platform_name, has_ssh_dir, multiplexed):
+    """Connection sharing is only requested where ssh supports it."""
+    monkeypatch.setattr(surfmeta.utils.sys, "platform", platform_name)
+    monkeypatch.setattr(surfmeta.utils.Path, "home", lambda: tmp_path)
+    if has_ssh_dir:
+        (tmp_path / ".ssh").mkdir()
+
+    options = surfmeta.utils._ssh_multiplex_options()
+
+    assert ("ControlPath=~/.ssh/cm-%C" in options) is multiplexed
+    assert options == (surfmeta.utils.SSH_MULTIPLEX_OPTIONS if multiplexed else ())
+
+
 def test_calculate_remote_checksum_invalid_algorithm():
     """Unsupported algorithm should raise ValueError."""
     with pytest.raises(ValueError):
@@ -100,3 +227,19 @@ def test_meta_checksum_local_missing_file(tmp_path: Path):
         assert len(w) == 1
         assert "not a file" in str(w[0].message)
         assert result == {}
+
+
+@pytest.mark.parametrize("protocols", ['["ssh", "rsync"]', "rsync", '"rsync"', ["rsync"]])
+def test_build_transfer_commands_protocols(protocols):
+    """JSON lists, JSON strings, bare names and lists all select the same protocols."""
+    dataset = {
+        "extras": [
+            {"key": "server", "value": "snellius.surf.nl"},
+            {"key": "location", "value": "/data/file.txt"},
+            {"key": "protocols", "value": protocols},
+        ]
+    }
+    commands = build_transfer_commands(dataset, "user", "/tmp")
+
+    assert commands["rsync"] == "rsync -avz user@snellius.surf.nl:/data/file.txt /tmp"
+    assert ("scp" in commands) == ("ssh" in protocols)